@@ -7,21 +7,101 @@ from __future__ import annotations
 
 import math
 import warnings
-from typing import TYPE_CHECKING, Optional, Tuple
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
 
 import torch
 import torch.nn as nn
-from einops import rearrange
 
-from fla.modules import GroupNorm
+from fla.layers.utils import has_padding
+from fla.modules import FusedGroupNormGated, GroupNorm
 from fla.modules.activations import ACT2FN
 from fla.modules.token_shift import token_shift
 from fla.ops.rwkv6 import chunk_rwkv6, fused_recurrent_rwkv6
+from fla.ops.rwkv6.fused_addcmul import fused_addcmul_rwkv6, fused_lerp_rwkv6
+from fla.ops.rwkv6.fused_recurrent import fused_recurrent_rwkv6_step
+from fla.ops.utils import int8_weight_matmul
 
 if TYPE_CHECKING:
     from fla.models.utils import Cache
 
 
+def get_delta_workspace(cache: Cache, x: torch.Tensor) -> torch.Tensor:
+    """
+    Returns a scratch buffer shaped like `x` that is shared by all RWKV6 layers updating the same `cache`.
+    The buffer is kept in `cache.workspaces`, so it is freed along with the cache, and is only grown, never shrunk.
+    Only safe when no autograd graph keeps the previous contents alive, i.e., with grad disabled.
+    """
+    key = ('rwkv6_delta', x.device, x.dtype)
+    workspace = cache.workspaces.get(key, None)
+    if workspace is None or workspace.numel() < x.numel():
+        workspace = cache.workspaces[key] = torch.empty(x.numel(), device=x.device, dtype=x.dtype)
+    return workspace[:x.numel()].view_as(x)
+
+
+def free_delta_workspace(cache: Cache):
+    """
+    Drops the scratch buffers of `get_delta_workspace` from `cache`.
+    """
+    for key in [key for key in cache.workspaces if key[0] == 'rwkv6_delta']:
+        del cache.workspaces[key]
+
+
+class CachedGraphRunner:
+    """
+    Records `fn` as one CUDA graph per distinct set of input shapes, dtypes and devices, and replays it afterwards.
+
+    `fn` must map fixed-shape tensors to a tuple of tensors.
+    Captured graphs read any parameters and buffers from the addresses they had at capture time.
+    In-place updates such as `load_state_dict` keep the addresses and are picked up on replay,
+    but the owner must call `reset` once the tensors are moved, cast or replaced, e.g., by `.to()` or `.half()`.
+    Each graph holds its own memory pool, so at most `max_graphs` graphs are kept, evicting the least recently used.
+    Inputs are copied into static buffers before each replay,
+    and outputs are cloned so that callers, e.g., the cache, never alias the static buffers.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., Tuple[torch.Tensor, ...]],
+        num_warmups: int = 3,
+        max_graphs: int = 8
+    ):
+        self.fn = fn
+        self.num_warmups = num_warmups
+        self.max_graphs = max_graphs
+        self.graphs = OrderedDict()
+
+    def reset(self):
+        self.graphs.clear()
+
+    def __call__(self, *args: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        key = tuple((i.shape, i.dtype, i.device) for i in args)
+        if key not in self.graphs:
+            if len(self.graphs) >= self.max_graphs:
+                self.graphs.popitem(last=False)
+            static_inputs = tuple(i.clone() for i in args)
+            # warm up on a side stream so that autotuning and compilation are done before capturing
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream):
+                for _ in range(self.num_warmups):
+                    self.fn(*static_inputs)
+            torch.cuda.current_stream().wait_stream(stream)
+
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_outputs = self.fn(*static_inputs)
+            self.graphs[key] = (graph, static_inputs, static_outputs)
+        else:
+            self.graphs.move_to_end(key)
+
+        graph, static_inputs, static_outputs = self.graphs[key]
+        for static_input, i in zip(static_inputs, args):
+            static_input.copy_(i, non_blocking=True)
+        graph.replay()
+        return tuple(i.clone() for i in static_outputs)
+
+
 class RWKV6Attention(nn.Module):
 
     def __init__(
@@ -38,6 +118,7 @@ class RWKV6Attention(nn.Module):
         elementwise_affine: Optional[bool] = True,
         norm_eps: float = 1e-5,
         layer_idx: int = None,
+        use_decode_cuda_graph: bool = False,
         **kwargs
     ) -> RWKV6Attention:
         super().__init__()
@@ -47,12 +128,14 @@ class RWKV6Attention(nn.Module):
         self.expand_k = expand_k
         self.expand_v = expand_v
         self.num_heads = num_heads
+        self.fuse_norm = fuse_norm
         self.proj_low_rank_dim = proj_low_rank_dim
         self.gate_low_rank_dim = gate_low_rank_dim
 
         self.key_dim = int(hidden_size * expand_k)
         self.value_dim = int(hidden_size * expand_v)
         self.layer_idx = layer_idx
+        self.use_decode_cuda_graph = use_decode_cuda_graph
 
         assert mode in ['chunk', 'fused_recurrent'], f"Not supported mode `{mode}`."
         assert self.key_dim % num_heads == 0, f"key dim must be divisible by num_heads of {num_heads}"
@@ -61,7 +144,6 @@ class RWKV6Attention(nn.Module):
         self.head_k_dim = self.key_dim // num_heads
         self.head_v_dim = self.value_dim // num_heads
 
-        self.time_shift = nn.ZeroPad2d((0, 0, 1, -1))
         self.x_proj = nn.Sequential(
             LerpLinear(hidden_size, proj_low_rank_dim * 5),
             nn.Tanh(),
@@ -76,10 +158,29 @@ class RWKV6Attention(nn.Module):
         self.g_proj = DDLerpLinear(hidden_size, self.value_dim)
         self.bonus = nn.Parameter(torch.zeros(num_heads, self.head_k_dim))
 
-        # TODO: fuse GroupNorm and output gate
-        self.g_norm = GroupNorm(self.num_heads, self.value_dim, elementwise_affine=elementwise_affine, bias=True, eps=norm_eps)
+        # both branches keep the name `g_norm` so that checkpoints load regardless of `fuse_norm`
+        if fuse_norm and gate_fn in ['swish', 'silu', 'sigmoid']:
+            self.g_norm = FusedGroupNormGated(
+                num_groups=self.num_heads,
+                hidden_size=self.value_dim,
+                elementwise_affine=elementwise_affine,
+                bias=True,
+                activation=gate_fn,
+                eps=norm_eps
+            )
+            self.fuse_norm_and_gate = True
+        else:
+            self.fuse_norm_and_gate = False
+            self.g_norm = GroupNorm(
+                self.num_heads,
+                self.value_dim,
+                elementwise_affine=elementwise_affine,
+                bias=True,
+                eps=norm_eps
+            )
+            self.gate_fn = ACT2FN[gate_fn]
         self.o_proj = nn.Linear(self.value_dim, hidden_size, bias=False)
-        self.gate_fn = ACT2FN[gate_fn]
+        self._decode_graph_runner = None
 
         try:
             from transformers.modeling_utils import _init_weights
@@ -95,6 +196,11 @@ class RWKV6Attention(nn.Module):
             "Bo may disagree with results reported from this version."
         )
 
+    def _apply(self, fn, *args, **kwargs):
+        # captured graphs still point to the weights before they were moved or cast
+        self._decode_graph_runner = None
+        return super()._apply(fn, *args, **kwargs)
+
     def _initialize_weights(self, module: nn.Module):
         if getattr(module, "_is_hf_initialized", False):
             return
@@ -122,6 +228,9 @@ class RWKV6Attention(nn.Module):
                 "for padding purposes (0 indicating padding). "
                 "Arbitrary attention masks of shape [batch_size, seq_len, seq_len] are not allowed."
             )
+            # all-ones masks, e.g., unpadded batches, are no-ops, so we skip the masking passes altogether
+            if not has_padding(attention_mask):
+                attention_mask = None
 
         batch_size, seq_len, hidden_size = hidden_states.shape
         # launching the triton kernel for just one token will actually be slower
@@ -133,38 +242,128 @@ class RWKV6Attention(nn.Module):
 
         if attention_mask is not None:
             hidden_states = hidden_states.mul_(attention_mask[:, -hidden_states.shape[-2]:, None])
+        mask = attention_mask[:, -seq_len:] if attention_mask is not None else None
 
-        if hidden_states.shape[1] == 1 and last_state is not None:
-            shifted = last_state['conv_state'].unsqueeze(1)
-            delta = shifted - hidden_states
-        elif last_state is None:
-            delta = token_shift(hidden_states, cu_seqlens)
+        # conv_state [N, hidden_size]
+        conv_state = last_state['conv_state'] if last_state is not None else None
+        recurrent_state = last_state['recurrent_state'] if last_state is not None else None
+
+        # without autograd, `delta` is dead once the lerps are done, so all layers can share one buffer on the cache;
+        # decoding steps fold `delta` into the lerps and never read it, so the buffer of the prefill is released then
+        delta_out = None
+        if past_key_values is not None and not torch.is_grad_enabled():
+            if seq_len == 1 and conv_state is not None and cu_seqlens is None:
+                free_delta_workspace(past_key_values)
+            else:
+                delta_out = get_delta_workspace(past_key_values, hidden_states)
+
+        # an unmasked decoding step has fixed shapes, so it can be replayed as a single CUDA graph;
+        # opt-in, as every batch size is captured as its own graph with its own memory pool
+        if (
+            self.use_decode_cuda_graph and hidden_states.is_cuda and not torch.is_grad_enabled()
+            and seq_len == 1 and cu_seqlens is None and mask is None
+            and conv_state is not None and recurrent_state is not None
+        ):
+            if self._decode_graph_runner is None:
+                self._decode_graph_runner = CachedGraphRunner(
+                    lambda *args: self._forward_impl(*args, mask=None, output_final_state=True)
+                )
+            o, conv_state, recurrent_state = self._decode_graph_runner(hidden_states, conv_state, recurrent_state)
         else:
-            shifted = self.time_shift(hidden_states)
-            shifted[:, 0] = last_state['conv_state']
-            delta = shifted - hidden_states
+            o, conv_state, recurrent_state = self._forward_impl(
+                hidden_states,
+                conv_state,
+                recurrent_state,
+                mask=mask,
+                output_final_state=use_cache,
+                cu_seqlens=cu_seqlens,
+                mode=mode,
+                delta_out=delta_out
+            )
 
-        x = self.x_proj[0](hidden_states, delta, cu_seqlens).view(batch_size, seq_len, -1, self.proj_low_rank_dim)
-        x = torch.einsum('b t n r, h n r-> b t n h', self.x_proj[1](x), self.x_proj[2].weight.view(hidden_size, 5, -1))
+        if past_key_values is not None:
+            past_key_values.update(
+                recurrent_state=recurrent_state,
+                conv_state=conv_state,
+                layer_idx=self.layer_idx,
+                offset=seq_len
+            )
 
-        r, w, k, v, g = x.add_(self.x_bias).unbind(-2)
-        r = self.r_proj(hidden_states, r, delta, cu_seqlens)
-        w = self.w_proj(hidden_states, w, delta, cu_seqlens)
-        k = self.k_proj(hidden_states, k, delta, cu_seqlens)
-        v = self.v_proj(hidden_states, v, delta, cu_seqlens)
-        g = self.g_proj(hidden_states, g, delta, cu_seqlens)
+        return o, None, past_key_values
 
-        # dealing with left-padding
-        if attention_mask is not None:
-            v = v.mul_(attention_mask[:, -v.shape[-2]:, None])
-        r, w, k = map(lambda x: rearrange(x, 'b t (h d) -> b t h d', d=self.head_k_dim), (r, w, k))
-        v = rearrange(v, 'b t (h d) -> b t h d', d=self.head_v_dim)
-        w = -torch.exp(w)
+    def _forward_impl(
+        self,
+        hidden_states: torch.Tensor,
+        conv_state: Optional[torch.Tensor] = None,
+        recurrent_state: Optional[torch.Tensor] = None,
+        mask: Optional[torch.Tensor] = None,
+        output_final_state: bool = False,
+        cu_seqlens: Optional[torch.LongTensor] = None,
+        mode: str = 'fused_recurrent',
+        delta_out: Optional[torch.Tensor] = None
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor]]:
+        # all tensor work of one step, free of cache bookkeeping so that decoding can be captured as a CUDA graph
+        batch_size, seq_len, hidden_size = hidden_states.shape
+        # decoding on top of a cached token: `hidden_states + delta * mu` is just a lerp towards the cached token,
+        # so both lerps below read `conv_state` directly and `delta` is never materialized
+        fold_delta = seq_len == 1 and conv_state is not None and cu_seqlens is None
+        if fold_delta:
+            shifted = conv_state.unsqueeze(1)
+            x = self.x_proj[0].linear(torch.lerp(hidden_states, shifted, self.x_proj[0].mu))
+            conv_state = hidden_states[:, -1]
+        else:
+            # delta [batch_size, seq_len, hidden_size]
+            delta, conv_state = token_shift(
+                hidden_states,
+                cu_seqlens,
+                cache=conv_state,
+                output_cache=True,
+                out=delta_out
+            )
+            x = self.x_proj[0](hidden_states, delta, cu_seqlens)
+
+        # [B*T, 5, R]
+        x = x.view(-1, 5, self.proj_low_rank_dim)
+        # the five low-rank branches share no weights, so we run them as one strided-batched GEMM
+        # [5, B*T, R] @ [5, R, D] -> [5, B*T, D]
+        # the weight is reinterpreted as a transposed [5, R, D] view that bmm consumes as-is, no copy or cache needed
+        # `x_bias` is deliberately not folded in via `baddbmm`: cuBLAS would need the broadcast bias written out
+        # to the output first, while the lerp kernel below adds it in-register for free
+        x = torch.bmm(self.x_proj[1](x).transpose(0, 1), self.x_proj[2].weight.view(hidden_size, 5, -1).permute(1, 2, 0))
+        x = x.view(5, batch_size, seq_len, hidden_size)
+
+        # data-dependent lerps `hidden_states + delta * mu` of all five projections in a single pass,
+        # with the left-padding mask of `v` folded into the same kernel
+        if fold_delta:
+            xr, xw, xk, xv, xg = fused_lerp_rwkv6(hidden_states, shifted, x, self.x_bias, mask)
+        else:
+            xr, xw, xk, xv, xg = fused_addcmul_rwkv6(hidden_states, delta, x, self.x_bias, mask)
+        r = self.r_proj.linear(xr)
+        w = self.w_proj.linear(xw)
+        k = self.k_proj.linear(xk)
+        v = self.v_proj.linear(xv)
+        g = self.g_proj.linear(xg)
+
+        # plain views keep einops pattern parsing off the per-token decoding path
+        r, w, k = (i.view(batch_size, seq_len, self.num_heads, self.head_k_dim) for i in (r, w, k))
+        v = v.view(batch_size, seq_len, self.num_heads, self.head_v_dim)
+        # [H, K] is already the layout the kernels read, each head loading one contiguous row of `K` bonuses
         u = self.bonus
 
-        recurrent_state = last_state['recurrent_state'] if last_state is not None else None
-
-        if mode == 'fused_recurrent':
+        if seq_len == 1 and cu_seqlens is None:
+            # a single decoding step is cheaper as one compiled pointwise kernel than the Triton launches
+            o, recurrent_state = fused_recurrent_rwkv6_step(
+                r=r,
+                k=k,
+                v=v,
+                w=w,
+                u=u,
+                scale=1.,
+                initial_state=recurrent_state,
+                output_final_state=output_final_state,
+                use_neg_exp_w_in_kernel=True,
+            )
+        elif mode == 'fused_recurrent':
             o, recurrent_state = fused_recurrent_rwkv6(
                 r=r,
                 k=k,
@@ -173,8 +372,9 @@ class RWKV6Attention(nn.Module):
                 u=u,
                 scale=1.,
                 initial_state=recurrent_state,
-                output_final_state=use_cache,
+                output_final_state=output_final_state,
                 cu_seqlens=cu_seqlens,
+                use_neg_exp_w_in_kernel=True,
             )
         elif mode == 'chunk':
             o, recurrent_state = chunk_rwkv6(
@@ -185,24 +385,110 @@ class RWKV6Attention(nn.Module):
                 u=u,
                 scale=1.,
                 initial_state=recurrent_state,
-                output_final_state=use_cache,
+                output_final_state=output_final_state,
                 cu_seqlens=cu_seqlens,
+                use_neg_exp_w_in_kernel=True,
             )
         else:
             raise NotImplementedError(f"Not supported mode `{mode}`.")
 
-        if past_key_values is not None:
-            past_key_values.update(
-                recurrent_state=recurrent_state,
-                conv_state=hidden_states[:, -1],
-                layer_idx=self.layer_idx,
-                offset=r.shape[2]
-            )
-
-        o = self.g_norm(rearrange(o, '... h d -> ... (h d)')) * self.gate_fn(g)
+        if self.fuse_norm_and_gate:
+            o = self.g_norm(o.reshape(batch_size, seq_len, -1), g)
+        else:
+            o = self.g_norm(o.reshape(batch_size, seq_len, -1)) * self.gate_fn(g)
         o = self.o_proj(o)
+        return o, conv_state, recurrent_state
+
+    @torch.no_grad()
+    def quantize_(self) -> RWKV6Attention:
+        """
+        Swaps every dense `nn.Linear` of the `x_proj` input and the r/w/k/v/g projections for an `Int8Linear` in-place.
+        The output weight of `x_proj` feeds the batched GEMM directly and is kept as is.
+        Intended for inference only: the quantized weights are buffers and receive no gradients.
+        """
+        def swap(module: nn.Module):
+            for name, child in module.named_children():
+                if isinstance(child, nn.Linear):
+                    setattr(module, name, Int8Linear.from_linear(child))
+                else:
+                    swap(child)
+        for proj in (self.x_proj[0], self.r_proj, self.w_proj, self.k_proj, self.v_proj, self.g_proj):
+            swap(proj)
+        # graphs recorded so far still point to the old weights
+        self._decode_graph_runner = None
+        return self
+
+
+class Int8Linear(nn.Module):
+    """
+    An inference-only linear layer with int8 weights and per-output-channel scales.
+
+    With more than 16 tokens, activations are quantized per token on the fly,
+    so that the GEMM runs on int8 tensor cores via `torch._int_mm`.
+    Smaller inputs, i.e., decoding steps, which `torch._int_mm` rejects, go through a weight-only int8 Triton kernel
+    that dequantizes the weight in registers.
+    Either way, the weight is read once in 1 byte per element, half the bytes of a 16-bit layer.
+    Scales are kept in fp32.
+    """
 
-        return o, None, past_key_values
+    def __init__(
+        self,
+        input_dim: int,
+        output_dim: int,
+        bias: bool = False,
+        device: Optional[torch.device] = None,
+        dtype: Optional[torch.dtype] = None
+    ):
+        super().__init__()
+
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+
+        self.register_buffer('weight', torch.zeros(output_dim, input_dim, device=device, dtype=torch.int8))
+        self.register_buffer('scale', torch.ones(output_dim, device=device, dtype=torch.float))
+        if bias:
+            self.register_buffer('bias', torch.zeros(output_dim, device=device, dtype=dtype))
+        else:
+            self.bias = None
+
+    def __repr__(self) -> str:
+        s = f"{self.__class__.__name__}({self.input_dim}, {self.output_dim}"
+        if self.bias is None:
+            s += ", bias=False"
+        s += ")"
+        return s
+
+    @classmethod
+    @torch.no_grad()
+    def from_linear(cls, linear: nn.Linear) -> Int8Linear:
+        weight = linear.weight.float()
+        layer = cls(
+            linear.in_features,
+            linear.out_features,
+            bias=linear.bias is not None,
+            device=weight.device,
+            dtype=linear.weight.dtype
+        )
+        # symmetric per-output-channel quantization
+        scale = weight.abs().amax(-1).clamp_min(1e-5) / 127
+        layer.weight.copy_((weight / scale[:, None]).round().clamp_(-127, 127).to(torch.int8))
+        layer.scale.copy_(scale)
+        if linear.bias is not None:
+            layer.bias.copy_(linear.bias)
+        return layer
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        shape, x = x.shape, x.reshape(-1, self.input_dim)
+        if x.is_cuda and x.shape[0] > 16 and self.input_dim % 8 == 0 and self.output_dim % 8 == 0:
+            # symmetric per-token quantization of the activations
+            x_scale = x.abs().amax(-1, keepdim=True).float().clamp_min(1e-5) / 127
+            x_int8 = (x / x_scale).round().clamp_(-127, 127).to(torch.int8)
+            y = (torch._int_mm(x_int8, self.weight.t()) * x_scale * self.scale).to(x.dtype)
+            if self.bias is not None:
+                y = y + self.bias
+        else:
+            y = int8_weight_matmul(x, self.weight, self.scale, self.bias)
+        return y.view(*shape[:-1], self.output_dim)
 
 
 class LoRA(nn.Module):
@@ -256,22 +542,29 @@ class LoRA(nn.Module):
     def _initialize_weights(self, module: nn.Module):
         if getattr(module, "_is_hf_initialized", False):
             return
+        # `self.apply` visits every submodule before the LoRA itself, and each visit used to redo the
+        # whole init below, i.e., one QR per submodule; we only flag them and init once on the LoRA itself
+        if module is not self:
+            module._is_hf_initialized = True
+            return
 
         # Initialize weights to zero as in original code
         nn.init.zeros_(self.lora[0].weight)
-        original_dtype = self.lora[2].weight.dtype
-        shape = self.lora[2].weight.shape
-        # Convert to float32 for numerical stability in orthogonal init
-        weight_fp32 = self.lora[2].weight.float()
+        weight = self.lora[2].weight
+        rows, cols = weight.shape
 
         # Calculate gain based on dimensions
-        gain = math.sqrt(shape[1] / shape[0]) if shape[1] > shape[0] else 1
-
-        # Apply orthogonal initialization with scaling factor 0.1
-        nn.init.orthogonal_(weight_fp32, gain=gain * 0.1)
-
-        # Convert back to original dtype
-        self.lora[2].weight.data.copy_(weight_fp32.to(original_dtype))
+        gain = math.sqrt(cols / rows) if cols > rows else 1
+
+        # Orthogonal initialization with scaling factor 0.1, following `nn.init.orthogonal_`.
+        # The QR is done in float32 for numerical stability, but rather than round-tripping the weight through
+        # a float32 copy, we build the float32 Q factor directly and cast it into the weight during the copy
+        flattened = torch.randn(max(rows, cols), min(rows, cols), device=weight.device, dtype=torch.float)
+        q, r = torch.linalg.qr(flattened)
+        del flattened
+        # make Q uniform
+        q.mul_(torch.diagonal(r).sign().mul_(gain * 0.1))
+        weight.data.copy_(q.t() if rows < cols else q)
         # Set Lora[2] bias to zero
         if self.lora[2].bias is not None:
             nn.init.zeros_(self.lora[2].bias)
@@ -306,7 +599,6 @@ class LerpLinear(nn.Module):
         self.output_dim = output_dim
         self.low_rank_dim = low_rank_dim
 
-        self.time_shift = nn.ZeroPad2d((0, 0, 1, -1))
         if low_rank_dim is None:
             self.linear = nn.Linear(input_dim, output_dim, bias=False)
         else:
@@ -324,7 +616,7 @@ class LerpLinear(nn.Module):
                 cu_seqlens: Optional[torch.LongTensor] = None) -> torch.Tensor:
         if delta is None:
             delta = token_shift(x, cu_seqlens)
-        return self.linear(x + delta * self.mu)
+        return self.linear(torch.addcmul(x, delta, self.mu))
 
 
 class DDLerpLinear(nn.Module):
@@ -341,7 +633,6 @@ class DDLerpLinear(nn.Module):
         self.output_dim = output_dim
         self.low_rank_dim = low_rank_dim
 
-        self.time_shift = nn.ZeroPad2d((0, 0, 1, -1))
         if low_rank_dim is None:
             self.linear = nn.Linear(input_dim, output_dim, bias=False)
         else:
@@ -359,4 +650,4 @@ class DDLerpLinear(nn.Module):
                 cu_seqlens: Optional[torch.LongTensor] = None) -> torch.Tensor:
         if delta is None:
             delta = token_shift(x, cu_seqlens)
-        return self.linear(x + delta * mu)
+        return self.linear(torch.addcmul(x, delta, mu))
@@ -98,6 +98,15 @@ def get_unpad_data(
     return indices, cu_seqlens, max_seqlen_in_batch
 
 
+@tensor_cache
+def has_padding(attention_mask: torch.Tensor) -> bool:
+    """
+    Checks whether a 0-1 `attention_mask` of shape (batch_size, sequence_length) masks out any token.
+    The result is cached for the most recent mask, so the host sync is paid once per forward rather than once per layer.
+    """
+    return not attention_mask.all().item()
+
+
 def unpad_input(
     q: torch.Tensor,
     states: Tuple[torch.Tensor],
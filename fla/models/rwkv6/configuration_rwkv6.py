@@ -39,6 +39,7 @@ class RWKV6Config(PretrainedConfig):
         fuse_cross_entropy: bool = True,
         fuse_linear_cross_entropy: bool = False,
         use_l2warp: bool = False,
+        use_decode_cuda_graph: bool = False,
         vocab_size: int = 32000,
         **kwargs
     ):
@@ -64,6 +65,7 @@ class RWKV6Config(PretrainedConfig):
         self.fuse_cross_entropy = fuse_cross_entropy
         self.fuse_linear_cross_entropy = fuse_linear_cross_entropy
         self.use_l2warp = use_l2warp
+        self.use_decode_cuda_graph = use_decode_cuda_graph
         self.vocab_size = vocab_size
 
         if fuse_cross_entropy and fuse_linear_cross_entropy:
@@ -16,6 +16,7 @@ from transformers.utils.deprecation import deprecate_kwarg
 
 from fla.layers.attn import Attention
 from fla.layers.rwkv6 import LerpLinear, RWKV6Attention
+from fla.layers.utils import has_padding
 from fla.models.rwkv6.configuration_rwkv6 import RWKV6Config
 from fla.models.utils import Cache
 from fla.modules import FusedCrossEntropyLoss, FusedLinearCrossEntropyLoss, LayerNorm
@@ -56,8 +57,6 @@ class RWKV6FeedForward(nn.Module):
         self.hidden_ratio = hidden_ratio
         self.intermediate_size = intermediate_size
 
-        self.time_shift = nn.ZeroPad2d((0, 0, 1, -1))
-
         self.key = LerpLinear(hidden_size, intermediate_size)
         self.value = nn.Linear(intermediate_size, hidden_size, bias=False)
         self.receptance = LerpLinear(hidden_size, hidden_size)
@@ -73,25 +72,20 @@ class RWKV6FeedForward(nn.Module):
         cu_seqlens: Optional[torch.LongTensor] = None,
         **kwargs
     ) -> torch.Tensor:
-        if attention_mask is not None:
+        if attention_mask is not None and has_padding(attention_mask):
             x = x.mul_(attention_mask[:, -x.shape[-2]:, None])
-        if x.shape[1] == 1 and state is not None and state[self.layer_idx]['ffn_state'] is not None:
-            shifted = state[self.layer_idx]['ffn_state'].unsqueeze(1)
-            delta = shifted - x
-        elif state is not None and state[self.layer_idx]['ffn_state'] is not None:
-            shifted = self.time_shift(x)
-            if state is not None and state[self.layer_idx]['ffn_state'] is not None:
-                shifted[:, 0] = state[self.layer_idx]['ffn_state']
-            delta = shifted - x
-        else:
-            delta = token_shift(x, cu_seqlens)
+        ffn_state = None
+        if state is not None and state[self.layer_idx]['ffn_state'] is not None:
+            ffn_state = state[self.layer_idx]['ffn_state']
+        # the returned cache holds the last token of each sequence, i.e., `[N, D]` also under `cu_seqlens`
+        delta, ffn_state = token_shift(x, cu_seqlens, cache=ffn_state, output_cache=True)
         key = self.act_fn(self.key(x, delta))
         value = self.value(key)
         receptance = self.receptance(x, delta)
 
         if state is not None:
             # no need to update the offset twice
-            state.update(ffn_state=x[:, -1], layer_idx=self.layer_idx, offset=0)
+            state.update(ffn_state=ffn_state, layer_idx=self.layer_idx, offset=0)
         return receptance.sigmoid() * value, state
 
 
@@ -136,7 +130,8 @@ class RWKV6Block(GradientCheckpointingLayer):
                 gate_low_rank_dim=config.gate_low_rank_dim,
                 norm_eps=config.norm_eps,
                 fuse_norm=config.fuse_norm,
-                layer_idx=layer_idx
+                layer_idx=layer_idx,
+                use_decode_cuda_graph=config.use_decode_cuda_graph
             )
         self.ffn_norm = (LayerNorm if config.fuse_norm else nn.LayerNorm)(
             config.hidden_size,
@@ -109,6 +109,8 @@ class LegacyCache(HFCacheBase):
         super().__init__()
 
         self.states: List[Dict[str, Any]] = []
+        # scratch buffers that layers share across one generation, freed along with the cache
+        self.workspaces: Dict[Any, torch.Tensor] = {}
 
         self._seen_tokens = seen_tokens  # Used in `generate` to keep tally of how many tokens the cache has seen
 
@@ -247,6 +249,8 @@ class NewStyleCache(HFCacheBase):
     def __init__(self, seen_tokens: int = 0, **kwargs):
         super().__init__(layer_classes=FlashLinearLayer, **kwargs)
         self._seen_tokens = int(seen_tokens)
+        # scratch buffers that layers share across one generation, freed along with the cache
+        self.workspaces: Dict[Any, torch.Tensor] = {}
 
     def update(
         self,
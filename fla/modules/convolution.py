@@ -3,6 +3,7 @@
 
 import math
 import warnings
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import torch
@@ -12,11 +13,56 @@ import triton
 import triton.language as tl
 from einops import rearrange
 
-from fla.ops.utils import prepare_chunk_indices, prepare_sequence_ids
-from fla.utils import get_multiprocessor_count, input_guard, is_amd
+from fla.ops.utils import prepare_chunk_indices, prepare_lens
+from fla.utils import get_multiprocessor_count, input_guard, is_amd, tensor_cache
 
 NUM_WARPS_AUTOTUNE = [2, 4, 8, 16] if is_amd else [4, 8, 16, 32]
-STATIC_WARPS = 32 if not is_amd else 16
+
+
+def prune_conv1d_configs(configs, named_args, **kwargs):
+    # drop configs that can not possibly win for the given shape before benchmarking them
+    args = {**named_args, **kwargs}
+    D, BT = args['D'], args['BT']
+    pruned = [
+        config for config in configs
+        if config.kwargs['BD'] <= triton.next_power_of_2(D)
+        and config.kwargs['BD'] * config.num_warps * 32 <= D * BT
+        and not (config.num_warps >= 16 and config.kwargs['BD'] <= 32)
+    ]
+    # always keep at least the smallest config
+    return pruned or [min(configs, key=lambda config: (config.kwargs['BD'], config.num_warps, config.num_stages))]
+
+
+@lru_cache(maxsize=256)
+def get_launch_params(B: int, T: int, W: int, device_index: Optional[int]) -> Tuple[int, int, int, int]:
+    # the launch meta-parameters only depend on the problem shape, so they are computed once per shape
+    BT = min(64, triton.next_power_of_2(triton.cdiv(max(16, B*T), get_multiprocessor_count(device_index))))
+    BW = triton.next_power_of_2(W)
+    NT = triton.cdiv(T, BT)
+    NB = triton.cdiv(B*T, 1024)
+    return BT, BW, NT, NB
+
+
+# applied below the autotuner, so `BD` is already known when these are evaluated
+EVEN_HEURISTICS = {
+    'EVEN_T': lambda args: args['cu_seqlens'] is None and args['T'] % args['BT'] == 0,
+    'EVEN_D': lambda args: args['D'] % args['BD'] == 0,
+}
+
+
+@tensor_cache
+def prepare_seq_idx(cu_seqlens: torch.LongTensor) -> torch.IntTensor:
+    # [1, T], the int32 sequence index of each token as expected by causal-conv1d
+    lens = prepare_lens(cu_seqlens)
+    seq_idx = torch.arange(len(lens), dtype=torch.int32, device=cu_seqlens.device)
+    return torch.repeat_interleave(seq_idx, lens).unsqueeze_(0)
+
+
+def zero_dw_db(nargs):
+    # `dw` and `db` are accumulated atomically, so they have to be cleared before every (benchmarking) run
+    for name in ('dw', 'db'):
+        if nargs[name] is not None:
+            nargs[name].zero_()
 
 
 try:
@@ -33,27 +79,37 @@ except ImportError:
     'HAS_RESIDUAL': lambda args: args['residual'] is not None,
     'USE_INITIAL_STATE': lambda args: args['initial_state'] is not None,
     'IS_VARLEN': lambda args: args['cu_seqlens'] is not None,
+    'STORE_PRE_ACT': lambda args: args['pre_act'] is not None,
+    'HAS_MASK': lambda args: args['mask'] is not None,
+    'STORE_FINAL_STATE': lambda args: args['final_state'] is not None,
 })
 @triton.autotune(
     configs=[
-        triton.Config({'BD': BD}, num_warps=num_warps)
+        triton.Config({'BD': BD}, num_warps=num_warps, num_stages=num_stages)
         for BD in [16, 32, 64, 128]
         for num_warps in NUM_WARPS_AUTOTUNE
+        for num_stages in [2, 3, 4]
     ],
     key=['D', 'W', 'NB'],
+    prune_configs_by={'early_config_prune': prune_conv1d_configs},
 )
+@triton.heuristics(EVEN_HEURISTICS)
 @triton.jit
 def causal_conv1d_fwd_kernel(
     x,
     y,
+    pre_act,
     weight,
     bias,
     residual,
+    mask,
     cu_seqlens,
     initial_state,
+    final_state,
     chunk_indices,
     B,
     T,
+    NT,
     D: tl.constexpr,
     W: tl.constexpr,
     BT: tl.constexpr,
@@ -66,89 +122,142 @@ def causal_conv1d_fwd_kernel(
     HAS_RESIDUAL: tl.constexpr,
     USE_INITIAL_STATE: tl.constexpr,
     IS_VARLEN: tl.constexpr,
+    STORE_PRE_ACT: tl.constexpr,
+    HAS_MASK: tl.constexpr,
+    STORE_FINAL_STATE: tl.constexpr,
+    EVEN_T: tl.constexpr,
+    EVEN_D: tl.constexpr,
 ):
-    i_d, i_t, i_b = tl.program_id(0), tl.program_id(1), tl.program_id(2)
-
-    if IS_VARLEN:
-        i_n, i_t = tl.load(chunk_indices + i_t * 2).to(tl.int32), tl.load(chunk_indices + i_t * 2 + 1).to(tl.int32)
-        bos, eos = tl.load(cu_seqlens + i_n), tl.load(cu_seqlens + i_n + 1)
-        T = eos - bos
-    else:
-        i_n = i_b
-        bos, eos = i_b * T, i_b * T + T
-
+    i_d, i_b = tl.program_id(0), tl.program_id(2)
     o_d = i_d * BD + tl.arange(0, BD)
-    o_w = tl.arange(0, BW) + W - BW
     m_d = o_d < D
-    m_w = o_w >= 0
-
-    if HAS_WEIGHT:
-        # [BD, BW]
-        b_w = tl.load(weight + o_d[:, None] * W + o_w, mask=m_d[:, None] & m_w, other=0).to(tl.float32)
-
-    b_y = tl.zeros((BT, BD), dtype=tl.float32)
-    if not USE_INITIAL_STATE:
-        for i_w in tl.static_range(-W + 1, 1):
-            p_yi = tl.make_block_ptr(x + bos * D, (T, D), (D, 1), (i_t * BT + i_w, i_d * BD), (BT, BD), (1, 0))
-            # [BT, BD]
-            b_yi = tl.load(p_yi, boundary_check=(0, 1)).to(tl.float32)
-            if HAS_WEIGHT:
-                b_yi *= tl.sum(b_w * (o_w == (i_w + W - 1)), 1)
-            b_y += b_yi
-    elif i_t * BT >= W:
-        # to make Triton compiler happy, we need to copy codes
-        for i_w in tl.static_range(-W + 1, 1):
-            p_yi = tl.make_block_ptr(x + bos * D, (T, D), (D, 1), (i_t * BT + i_w, i_d * BD), (BT, BD), (1, 0))
-            # [BT, BD]
-            b_yi = tl.load(p_yi, boundary_check=(0, 1)).to(tl.float32)
-            if HAS_WEIGHT:
-                b_yi *= tl.sum(b_w * (o_w == (i_w + W - 1)), 1)
-            b_y += b_yi
-    else:
-        o_t = i_t * BT + tl.arange(0, BT)
-        for i_w in tl.static_range(-W + 1, 1):
-            o_x = o_t + i_w
-            m_x = ((o_x >= 0) & (o_x < T))[:, None] & m_d
-            m_c = ((o_x + W >= 0) & (o_x < 0))[:, None] & m_d
-
-            b_yi = tl.load(x + bos * D + o_x[:, None] * D + o_d, mask=m_x, other=0).to(tl.float32)
-
-            b_yi += tl.load(initial_state + i_n * D*W + o_d * W + (o_x + W)[:, None], mask=m_c, other=0).to(tl.float32)
-
-            if HAS_WEIGHT:
-                b_yi *= tl.sum(b_w * (o_w == (i_w + W - 1)), 1)
-            b_y += b_yi
-
     if HAS_BIAS:
-        b_y += tl.load(bias + o_d, mask=m_d).to(tl.float32)
-
-    if ACTIVATION == 'swish' or ACTIVATION == 'silu':
-        b_y = b_y * tl.sigmoid(b_y)
-
-    if HAS_RESIDUAL:
-        p_residual = tl.make_block_ptr(residual + bos * D, (T, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
-        b_residual = tl.load(p_residual, boundary_check=(0, 1))
-        b_y += b_residual
+        # [BD], shared by all chunks visited by this program
+        b_b = tl.load(bias + o_d, mask=m_d, other=0).to(tl.float32)
+
+    # persistent along the time axis: each program walks over a strip of chunks
+    for i_c in range(tl.program_id(1), NT, tl.num_programs(1)):
+        if IS_VARLEN:
+            # load the (i_n, i_t) pair with a single vector load
+            i_n, i_t = tl.split(tl.load(chunk_indices + i_c * 2 + tl.arange(0, 2)).to(tl.int32))
+            bos, eos = tl.load(cu_seqlens + i_n), tl.load(cu_seqlens + i_n + 1)
+            T_n = eos - bos
+        else:
+            i_n, i_t = i_b, i_c
+            bos, eos = i_b * T, i_b * T + T
+            T_n = T
+
+        b_y = tl.zeros((BT, BD), dtype=tl.float32)
+        if not USE_INITIAL_STATE:
+            for i_w in tl.static_range(-W + 1, 1):
+                p_yi = tl.make_block_ptr(x + bos * D, (T_n, D), (D, 1), (i_t * BT + i_w, i_d * BD), (BT, BD), (1, 0))
+                # [BT, BD]
+                b_yi = tl.load(p_yi, boundary_check=(0, 1)).to(tl.float32)
+                if HAS_MASK:
+                    o_x = i_t * BT + i_w + tl.arange(0, BT)
+                    b_yi *= tl.load(mask + bos + o_x, mask=(o_x >= 0) & (o_x < T_n), other=0).to(tl.float32)[:, None]
+                if HAS_WEIGHT:
+                    # [BD]
+                    b_yi *= tl.load(weight + o_d * W + i_w + W - 1, mask=m_d, other=0).to(tl.float32)[None, :]
+                b_y += b_yi
+        elif i_t * BT >= W:
+            # to make Triton compiler happy, we need to copy codes
+            for i_w in tl.static_range(-W + 1, 1):
+                p_yi = tl.make_block_ptr(x + bos * D, (T_n, D), (D, 1), (i_t * BT + i_w, i_d * BD), (BT, BD), (1, 0))
+                # [BT, BD]
+                b_yi = tl.load(p_yi, boundary_check=(0, 1)).to(tl.float32)
+                if HAS_MASK:
+                    o_x = i_t * BT + i_w + tl.arange(0, BT)
+                    b_yi *= tl.load(mask + bos + o_x, mask=(o_x >= 0) & (o_x < T_n), other=0).to(tl.float32)[:, None]
+                if HAS_WEIGHT:
+                    # [BD]
+                    b_yi *= tl.load(weight + o_d * W + i_w + W - 1, mask=m_d, other=0).to(tl.float32)[None, :]
+                b_y += b_yi
+        else:
+            o_t = i_t * BT + tl.arange(0, BT)
+            for i_w in tl.static_range(-W + 1, 1):
+                o_x = o_t + i_w
+                m_x = ((o_x >= 0) & (o_x < T_n))[:, None] & m_d
+                m_c = ((o_x + W >= 0) & (o_x < 0))[:, None] & m_d
+
+                b_yi = tl.load(x + bos * D + o_x[:, None] * D + o_d, mask=m_x, other=0).to(tl.float32)
+                if HAS_MASK:
+                    b_yi *= tl.load(mask + bos + o_x, mask=(o_x >= 0) & (o_x < T_n), other=0).to(tl.float32)[:, None]
+
+                b_yi += tl.load(initial_state + i_n * D*W + o_d * W + (o_x + W)[:, None], mask=m_c, other=0).to(tl.float32)
 
-    p_y = tl.make_block_ptr(y + bos * D, (T, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
-    tl.store(p_y, tl.cast(b_y, dtype=p_y.dtype.element_ty, fp_downcast_rounding='rtne'), boundary_check=(0, 1))
+                if HAS_WEIGHT:
+                    # [BD]
+                    b_yi *= tl.load(weight + o_d * W + i_w + W - 1, mask=m_d, other=0).to(tl.float32)[None, :]
+                b_y += b_yi
+
+        if HAS_BIAS:
+            b_y += b_b[None, :]
+
+        if STORE_PRE_ACT:
+            # keep the pre-activation output around so that the backward pass does not need to recompute it
+            p_pre_act = tl.make_block_ptr(pre_act + bos * D, (T_n, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
+            if EVEN_T and EVEN_D:
+                tl.store(p_pre_act, b_y.to(p_pre_act.dtype.element_ty))
+            else:
+                tl.store(p_pre_act, b_y.to(p_pre_act.dtype.element_ty), boundary_check=(0, 1))
+
+        if ACTIVATION == 'swish' or ACTIVATION == 'silu':
+            b_y = b_y * tl.sigmoid(b_y)
+
+        if HAS_RESIDUAL:
+            p_residual = tl.make_block_ptr(residual + bos * D, (T_n, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
+            b_residual = tl.load(p_residual, boundary_check=(0, 1))
+            b_y += b_residual
+
+        p_y = tl.make_block_ptr(y + bos * D, (T_n, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
+        # the tile is fully in-bounds for all blocks when both dims are evenly divisible
+        if EVEN_T and EVEN_D:
+            tl.store(p_y, tl.cast(b_y, dtype=p_y.dtype.element_ty, fp_downcast_rounding='rtne'))
+        else:
+            tl.store(p_y, tl.cast(b_y, dtype=p_y.dtype.element_ty, fp_downcast_rounding='rtne'), boundary_check=(0, 1))
+
+        # the last chunk of each sequence writes out the final state, i.e., the last `W` inputs
+        if STORE_FINAL_STATE:
+            if i_t * BT + BT >= T_n:
+                o_w = tl.arange(0, BW) + W - BW
+                m_w = o_w >= 0
+                o_s = eos - W + o_w
+                m_s = (o_s >= bos) & m_w
+                # [BD, BW]
+                b_s = tl.load(x + o_s[None, :] * D + o_d[:, None], mask=m_d[:, None] & m_s[None, :], other=0).to(tl.float32)
+                if HAS_MASK:
+                    b_s *= tl.load(mask + o_s, mask=m_s, other=0).to(tl.float32)[None, :]
+                if USE_INITIAL_STATE:
+                    # sequences shorter than `W` keep the tail of the initial state
+                    o_c = o_w + T_n
+                    m_c = (o_c < W) & m_w
+                    b_s += tl.load(initial_state + i_n * D*W + o_d[:, None] * W + o_c[None, :],
+                                   mask=m_d[:, None] & m_c[None, :], other=0).to(tl.float32)
+                tl.store(final_state + i_n * D*W + o_d[:, None] * W + o_w[None, :],
+                         b_s.to(final_state.dtype.element_ty), mask=m_d[:, None] & m_w[None, :])
 
 
 @triton.heuristics({
     'HAS_WEIGHT': lambda args: args['dw'] is not None,
     'HAS_BIAS': lambda args: args['db'] is not None,
-    'USE_INITIAL_STATE': lambda args: args['dh0'] is not None,
+    'USE_INITIAL_STATE': lambda args: args['initial_state'] is not None,
+    'USE_DH0': lambda args: args['dh0'] is not None,
     'USE_FINAL_STATE': lambda args: args['dht'] is not None,
-    'IS_VARLEN': lambda args: args['cu_seqlens'] is not None
+    'IS_VARLEN': lambda args: args['cu_seqlens'] is not None,
+    'HAS_MASK': lambda args: args['mask'] is not None,
 })
 @triton.autotune(
     configs=[
-        triton.Config({'BD': BD}, num_warps=num_warps)
+        triton.Config({'BD': BD}, num_warps=num_warps, num_stages=num_stages, pre_hook=zero_dw_db)
         for BD in [16, 32, 64, 128]
         for num_warps in [4, 8, 16, 32]
+        for num_stages in [2, 3, 4]
     ],
     key=['D', 'W', 'NB'],
+    prune_configs_by={'early_config_prune': prune_conv1d_configs},
 )
+@triton.heuristics(EVEN_HEURISTICS)
 @triton.jit
 def causal_conv1d_bwd_kernel(
     x,
@@ -161,6 +270,7 @@ def causal_conv1d_bwd_kernel(
     dx,
     dw,
     db,
+    mask,
     cu_seqlens,
     chunk_indices,
     B,
@@ -175,36 +285,42 @@ def causal_conv1d_bwd_kernel(
     HAS_WEIGHT: tl.constexpr,
     HAS_BIAS: tl.constexpr,
     USE_INITIAL_STATE: tl.constexpr,
+    USE_DH0: tl.constexpr,
     USE_FINAL_STATE: tl.constexpr,
     IS_VARLEN: tl.constexpr,
+    HAS_MASK: tl.constexpr,
+    EVEN_T: tl.constexpr,
+    EVEN_D: tl.constexpr,
 ):
     i_d, i_t, i_b = tl.program_id(0), tl.program_id(1), tl.program_id(2)
     if IS_VARLEN:
-        i_tg = i_t
-        i_n, i_t = tl.load(chunk_indices + i_t * 2).to(tl.int32), tl.load(chunk_indices + i_t * 2 + 1).to(tl.int32)
+        # load the (i_n, i_t) pair with a single vector load
+        i_n, i_t = tl.split(tl.load(chunk_indices + i_t * 2 + tl.arange(0, 2)).to(tl.int32))
         bos, eos = tl.load(cu_seqlens + i_n), tl.load(cu_seqlens + i_n + 1)
         T = eos - bos
     else:
-        i_tg = i_b * tl.num_programs(1) + i_t
         i_n = i_b
         bos, eos = i_b * T, i_b * T + T
 
     o_d = i_d * BD + tl.arange(0, BD)
-    o_w = tl.arange(0, BW) + W - BW
     m_d = o_d < D
-    m_w = o_w >= 0
+    if HAS_MASK:
+        o_m = i_t * BT + tl.arange(0, BT)
+        # [BT]
+        b_m = tl.load(mask + bos + o_m, mask=o_m < T, other=0).to(tl.float32)
 
     if HAS_WEIGHT:
         p_x = tl.make_block_ptr(x + bos * D, (T, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
         b_x = tl.load(p_x, boundary_check=(0, 1))
-        # [BD, BW]
-        b_w = tl.load(weight + o_d[:, None] * W + o_w, mask=m_d[:, None] & m_w, other=0)
+        if HAS_MASK:
+            b_x = b_x * b_m[:, None]
 
     b_dx = tl.zeros((BT, BD), dtype=tl.float32)
     if HAS_BIAS:
         b_db = tl.zeros((BD,), dtype=tl.float32)
 
-    if not USE_FINAL_STATE:
+    # only the first chunks of each sequence can see the initial state
+    if not USE_INITIAL_STATE:
         for i_w in tl.static_range(0, W):
             p_dy = tl.make_block_ptr(dy + bos * D, (T, D), (D, 1), (i_t * BT + i_w, i_d * BD), (BT, BD), (1, 0))
             # [BT, BD]
@@ -217,10 +333,10 @@ def causal_conv1d_bwd_kernel(
             b_wdy = b_dy
             if HAS_WEIGHT:
                 # [BT, BD]
-                b_wdy = b_wdy * tl.sum(b_w * (o_w == (W - i_w - 1)), 1)
+                b_wdy = b_wdy * tl.load(weight + o_d * W + W - i_w - 1, mask=m_d, other=0).to(tl.float32)[None, :]
                 # [BD]
                 b_dw = tl.sum(b_dy * b_x, 0)
-                tl.store(dw + i_tg * D*W + o_d * W + W - i_w - 1, b_dw.to(dw.dtype.element_ty), mask=m_d)
+                tl.atomic_add(dw + o_d * W + W - i_w - 1, b_dw, mask=m_d)
             if HAS_BIAS and i_w == 0:
                 b_db += tl.sum(b_dy, 0)
             b_dx += b_wdy
@@ -238,10 +354,10 @@ def causal_conv1d_bwd_kernel(
             b_wdy = b_dy
             if HAS_WEIGHT:
                 # [BT, BD]
-                b_wdy = b_wdy * tl.sum(b_w * (o_w == (W - i_w - 1)), 1)
+                b_wdy = b_wdy * tl.load(weight + o_d * W + W - i_w - 1, mask=m_d, other=0).to(tl.float32)[None, :]
                 # [BD]
                 b_dw = tl.sum(b_dy * b_x, 0)
-                tl.store(dw + i_tg * D*W + o_d * W + W - i_w - 1, b_dw.to(dw.dtype.element_ty), mask=m_d)
+                tl.atomic_add(dw + o_d * W + W - i_w - 1, b_dw, mask=m_d)
             if HAS_BIAS and i_w == 0:
                 b_db += tl.sum(b_dy, 0)
             b_dx += b_wdy
@@ -278,14 +394,16 @@ def causal_conv1d_bwd_kernel(
                                    mask=(mask_c[:, None] & m_d[None, :]), other=0.0).to(tl.float32)
                     # add the gradient comes from initial_state
                     b_dw += tl.sum(b_dy_head * b_xc, 0)
-                tl.store(dw + i_tg * D * W + o_d * W + W - i_w - 1, b_dw.to(dw.dtype.element_ty), mask=m_d)
+                tl.atomic_add(dw + o_d * W + W - i_w - 1, b_dw, mask=m_d)
 
             if HAS_BIAS and i_w == 0:
                 b_db += tl.sum(b_dy_shift, 0)
-            b_wdy = b_dy_shift if not HAS_WEIGHT else (b_dy_shift * tl.sum(b_w * (o_w == (W - i_w - 1)), 1))
+            b_wdy = b_dy_shift
+            if HAS_WEIGHT:
+                b_wdy = b_wdy * tl.load(weight + o_d * W + W - i_w - 1, mask=m_d, other=0).to(tl.float32)[None, :]
             b_dx += b_wdy
 
-        if USE_INITIAL_STATE:
+        if USE_DH0:
             p_dy0 = tl.make_block_ptr(dy + bos * D, (T, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
             b_dy0 = tl.load(p_dy0, boundary_check=(0, 1)).to(tl.float32)
             if ACTIVATION == 'swish' or ACTIVATION == 'silu':
@@ -299,9 +417,9 @@ def causal_conv1d_bwd_kernel(
                 if HAS_WEIGHT:
                     # [BT]
                     w_idx_rows = i_w - 1 - o_t
-                    # [BT, BW]
-                    w_mask = (o_w[None, :] == w_idx_rows[:, None])
-                    w_pick = tl.sum(b_w[None, :, :] * w_mask[:, None, :], 2)
+                    # [BT, BD]
+                    w_pick = tl.load(weight + o_d[None, :] * W + w_idx_rows[:, None],
+                                     mask=(m_rows & (w_idx_rows >= 0))[:, None] & m_d[None, :], other=0).to(tl.float32)
                 else:
                     w_pick = 1.0
                 contrib = (b_dy0 * w_pick).to(tl.float32)
@@ -313,22 +431,27 @@ def causal_conv1d_bwd_kernel(
                          b_dh0_s.to(dh0.dtype.element_ty, fp_downcast_rounding='rtne'), mask=m_d)
 
     if HAS_BIAS:
-        b_db = tl.cast(b_db, dtype=db.dtype.element_ty, fp_downcast_rounding='rtne')
-        tl.store(db + i_tg * D + o_d, b_db, mask=m_d)
+        tl.atomic_add(db + o_d, b_db, mask=m_d)
 
     if USE_FINAL_STATE:
         if i_t * BT + BT >= T-W:
             start_tok = max(0, T - (W - 1))
             offset = i_t * BT + tl.arange(0, BT)
             tok_idx = offset - start_tok
-            mask = (offset >= start_tok) & (offset < T)
+            m_f = (offset >= start_tok) & (offset < T)
             w_idx = 1 + tok_idx
             dht_off = i_n * D * W + o_d[None, :] * W + w_idx[:, None]
-            b_dht = tl.load(dht + dht_off, mask=mask[:, None] & m_d[None, :], other=0.).to(tl.float32)
+            b_dht = tl.load(dht + dht_off, mask=m_f[:, None] & m_d[None, :], other=0.).to(tl.float32)
             b_dx += b_dht
 
+    if HAS_MASK:
+        b_dx *= b_m[:, None]
+
     p_dx = tl.make_block_ptr(dx + bos * D, (T, D), (D, 1), (i_t * BT, i_d * BD), (BT, BD), (1, 0))
-    tl.store(p_dx, tl.cast(b_dx, dtype=p_dx.dtype.element_ty, fp_downcast_rounding='rtne'), boundary_check=(0, 1))
+    if EVEN_T and EVEN_D:
+        tl.store(p_dx, tl.cast(b_dx, dtype=p_dx.dtype.element_ty, fp_downcast_rounding='rtne'))
+    else:
+        tl.store(p_dx, tl.cast(b_dx, dtype=p_dx.dtype.element_ty, fp_downcast_rounding='rtne'), boundary_check=(0, 1))
 
 
 @triton.heuristics({
@@ -337,6 +460,16 @@ def causal_conv1d_bwd_kernel(
     'HAS_BIAS': lambda args: args['bias'] is not None,
     'HAS_RESIDUAL': lambda args: args['residual'] is not None,
 })
+@triton.autotune(
+    configs=[
+        triton.Config({'BD': BD}, num_warps=num_warps)
+        for BD in [8, 16, 32, 64, 128]
+        for num_warps in NUM_WARPS_AUTOTUNE
+    ],
+    key=['D', 'W'],
+    # the cache is updated in-place, so it has to be restored after each benchmarking run
+    restore_value=['cache'],
+)
 @triton.jit
 def causal_conv1d_update_kernel(
     x,
@@ -355,7 +488,9 @@ def causal_conv1d_update_kernel(
     HAS_BIAS: tl.constexpr,
     HAS_RESIDUAL: tl.constexpr,
 ):
-    i_d, i_n = tl.program_id(0), tl.program_id(1)
+    # flattened (D, N) grid
+    i_dn, ND = tl.program_id(0), tl.cdiv(D, BD)
+    i_d, i_n = i_dn % ND, i_dn // ND
 
     o_d = i_d * BD + tl.arange(0, BD)
     o_w = tl.arange(0, BW) + W - BW
@@ -398,6 +533,71 @@ def causal_conv1d_update_kernel(
         tl.store(p_cache, b_cache, boundary_check=(0, 1))
 
 
+@triton.heuristics({
+    'HAS_WEIGHT': lambda args: args['weight'] is not None,
+    'HAS_BIAS': lambda args: args['bias'] is not None,
+    'HAS_RESIDUAL': lambda args: args['residual'] is not None,
+})
+@triton.autotune(
+    configs=[
+        triton.Config({'BD': BD}, num_warps=num_warps)
+        for BD in [8, 16, 32, 64, 128]
+        for num_warps in NUM_WARPS_AUTOTUNE
+    ],
+    key=['D', 'W'],
+    restore_value=['cache'],
+)
+@triton.jit
+def causal_conv1d_update_short_kernel(
+    x,
+    cache,
+    residual,
+    y,
+    weight,
+    bias,
+    D: tl.constexpr,
+    W: tl.constexpr,
+    BD: tl.constexpr,
+    ACTIVATION: tl.constexpr,
+    HAS_WEIGHT: tl.constexpr,
+    HAS_BIAS: tl.constexpr,
+    HAS_RESIDUAL: tl.constexpr,
+):
+    # same as `causal_conv1d_update_kernel`, but with the taps fully unrolled for small kernel sizes
+    i_dn, ND = tl.program_id(0), tl.cdiv(D, BD)
+    i_d, i_n = i_dn % ND, i_dn // ND
+
+    o_d = i_d * BD + tl.arange(0, BD)
+    m_d = o_d < D
+    p_cache = cache + i_n * D*W + o_d * W
+
+    # [BD]
+    b_x = tl.load(x + i_n * D + o_d, mask=m_d, other=0).to(tl.float32)
+    b_y = tl.zeros((BD,), dtype=tl.float32)
+    for i_w in tl.static_range(W):
+        # the cache is shifted by 1, with the current input entering the last slot
+        if i_w == W - 1:
+            b_c = b_x
+        else:
+            b_c = tl.load(p_cache + i_w + 1, mask=m_d, other=0).to(tl.float32)
+        if HAS_WEIGHT:
+            b_y += b_c * tl.load(weight + o_d * W + i_w, mask=m_d, other=0).to(tl.float32)
+        else:
+            b_y += b_c
+        # update the cache in-place, slot `i_w + 1` is read before it gets overwritten in the next step
+        tl.store(p_cache + i_w, tl.cast(b_c, dtype=cache.dtype.element_ty, fp_downcast_rounding='rtne'), mask=m_d)
+    if HAS_BIAS:
+        b_y += tl.load(bias + o_d, mask=m_d)
+
+    if ACTIVATION == 'swish' or ACTIVATION == 'silu':
+        b_y = b_y * tl.sigmoid(b_y)
+
+    if HAS_RESIDUAL:
+        b_y += tl.load(residual + i_n * D + o_d, mask=m_d, other=0)
+
+    tl.store(y + i_n * D + o_d, tl.cast(b_y, dtype=y.dtype.element_ty, fp_downcast_rounding='rtne'), mask=m_d)
+
+
 def causal_conv1d_fwd(
     x: torch.Tensor,
     weight: torch.Tensor,
@@ -407,30 +607,45 @@ def causal_conv1d_fwd(
     output_final_state: bool = False,
     activation: Optional[str] = None,
     cu_seqlens: Optional[torch.Tensor] = None,
+    pre_act: Optional[torch.Tensor] = None,
+    mask: Optional[torch.Tensor] = None,
 ) -> torch.Tensor:
     shape = x.shape
     if x.shape[-1] != weight.shape[0]:
         x = rearrange(x, 'b t ... -> b t (...)')
     B, T, D, W = *x.shape, weight.shape[1]
-    BT = min(64, triton.next_power_of_2(triton.cdiv(max(16, B*T), get_multiprocessor_count(x.device.index))))
-    BW = triton.next_power_of_2(W)
+    BT, BW, NT, NB = get_launch_params(B, T, W, x.device.index)
+    # `prepare_chunk_indices` is cached on the `cu_seqlens` tensor
     chunk_indices = prepare_chunk_indices(cu_seqlens, BT) if cu_seqlens is not None else None
-    NT = len(chunk_indices) if cu_seqlens is not None else triton.cdiv(T, BT)
-    NB = triton.cdiv(B*T, 1024)
+    if cu_seqlens is not None:
+        NT = len(chunk_indices)
+
+    # launch at most two programs per SM along the time axis, each looping over its chunks
+    NP = min(NT, 2 * get_multiprocessor_count(x.device.index))
 
     y = torch.empty_like(x)
-    def grid(meta): return (triton.cdiv(D, meta['BD']), NT, B)
+    # for fixed-length inputs the final state is written by the fwd kernel itself,
+    # varlen inputs keep the separate kernel so that empty sequences get a state as well
+    final_state = None
+    if output_final_state and cu_seqlens is None:
+        final_state = x.new_empty(B, D, W)
+
+    def grid(meta): return (triton.cdiv(D, meta['BD']), NP, B)
     causal_conv1d_fwd_kernel[grid](
         x=x,
         y=y,
+        pre_act=pre_act.view_as(x) if pre_act is not None else None,
         weight=weight,
         bias=bias,
         residual=residual,
+        mask=mask,
         cu_seqlens=cu_seqlens,
         initial_state=initial_state,
+        final_state=final_state,
         chunk_indices=chunk_indices,
         B=B,
         T=T,
+        NT=NT,
         D=D,
         W=W,
         BT=BT,
@@ -438,13 +653,13 @@ def causal_conv1d_fwd(
         NB=NB,
         ACTIVATION=activation,
     )
-    final_state = None
-    if output_final_state:
+    if output_final_state and cu_seqlens is not None:
         final_state = causal_conv1d_update_states(
             x=x,
             state_len=W,
             initial_state=initial_state,
             cu_seqlens=cu_seqlens,
+            mask=mask,
         )
     return y.view(shape), final_state
 
@@ -459,20 +674,27 @@ def causal_conv1d_bwd(
     initial_state: Optional[torch.Tensor] = None,
     activation: Optional[str] = None,
     cu_seqlens: Optional[torch.Tensor] = None,
+    y: Optional[torch.Tensor] = None,
+    mask: Optional[torch.Tensor] = None,
+    output_dh0: bool = True,
 ):
     shape = x.shape
     if x.shape[-1] != weight.shape[0]:
         x = rearrange(x, 'b t ... -> b t (...)')
     B, T, D = x.shape
     W = weight.shape[1] if weight is not None else None
-    BT = min(64, triton.next_power_of_2(triton.cdiv(max(16, B*T), get_multiprocessor_count(x.device.index))))
-    BW = triton.next_power_of_2(W)
+    BT, BW, NT, NB = get_launch_params(B, T, W, x.device.index)
     chunk_indices = prepare_chunk_indices(cu_seqlens, BT) if cu_seqlens is not None else None
-    NT = len(chunk_indices) if cu_seqlens is not None else triton.cdiv(T, BT)
-    NB = triton.cdiv(B*T, 1024)
-
-    y = None
-    if activation is not None:
+    if cu_seqlens is not None:
+        NT = len(chunk_indices)
+
+    # NOTE: the SiLU derivative in the kernel is written in terms of the *pre-activation* output,
+    # which is what both the cached buffer and the recomputation below provide
+    if activation is None:
+        y = None
+    elif y is not None:
+        y = y.view_as(x)
+    else:
         y, _ = causal_conv1d_fwd(
             x=x,
             weight=weight,
@@ -481,13 +703,18 @@ def causal_conv1d_bwd(
             initial_state=initial_state,
             activation=None,
             cu_seqlens=cu_seqlens,
-            output_final_state=False
+            output_final_state=False,
+            mask=mask,
         )
     dx = torch.empty_like(x)
-    dw = weight.new_empty(B*NT, *weight.shape, dtype=torch.float) if weight is not None else None
-    db = bias.new_empty(B*NT, *bias.shape, dtype=torch.float) if bias is not None else None
+    # fp32 buffers accumulated atomically across all blocks
+    dw = torch.zeros_like(weight, dtype=torch.float) if weight is not None else None
+    db = torch.zeros_like(bias, dtype=torch.float) if bias is not None else None
     dr = dy if residual is not None else None
-    dh0 = initial_state.new_zeros(min(NT, triton.cdiv(W, BT)), *initial_state.shape) if initial_state is not None else None
+    # slot 0 of the state is padding and is never written, so the buffer has to be zero-initialized
+    dh0 = None
+    if initial_state is not None and output_dh0:
+        dh0 = initial_state.new_zeros(min(NT, triton.cdiv(W, BT)), *initial_state.shape)
 
     def grid(meta): return (triton.cdiv(D, meta['BD']), NT, B)
     causal_conv1d_bwd_kernel[grid](
@@ -501,6 +728,7 @@ def causal_conv1d_bwd(
         dx=dx,
         dw=dw,
         db=db,
+        mask=mask,
         cu_seqlens=cu_seqlens,
         chunk_indices=chunk_indices,
         B=B,
@@ -513,10 +741,10 @@ def causal_conv1d_bwd(
         ACTIVATION=activation,
     )
     if weight is not None:
-        dw = dw.sum(0).to(weight)
+        dw = dw.to(weight)
     if bias is not None:
-        db = db.sum(0).to(bias)
-    if initial_state is not None:
+        db = db.to(bias)
+    if dh0 is not None:
         dh0 = dh0.sum(0, dtype=torch.float32).to(initial_state)
 
     return dx.view(shape), dw, db, dr, dh0
@@ -524,13 +752,15 @@ def causal_conv1d_bwd(
 
 @triton.heuristics({
     'USE_INITIAL_STATE': lambda args: args['initial_state'] is not None,
-    'IS_VARLEN': lambda args: args['cu_seqlens'] is not None
+    'IS_VARLEN': lambda args: args['cu_seqlens'] is not None,
+    'HAS_MASK': lambda args: args['mask'] is not None,
 })
 @triton.jit
 def causal_conv1d_states_fwd_kernel(
     x,
     initial_state,
     final_state,
+    mask,
     cu_seqlens,
     T,
     D,
@@ -539,8 +769,11 @@ def causal_conv1d_states_fwd_kernel(
     BW: tl.constexpr,
     USE_INITIAL_STATE: tl.constexpr,
     IS_VARLEN: tl.constexpr,
+    HAS_MASK: tl.constexpr,
 ):
-    i_d, i_n = tl.program_id(0), tl.program_id(1)
+    # flattened (D, N) grid
+    i_dn, ND = tl.program_id(0), tl.cdiv(D, BD)
+    i_d, i_n = i_dn % ND, i_dn // ND
     if IS_VARLEN:
         bos, eos = tl.load(cu_seqlens + i_n), tl.load(cu_seqlens + i_n + 1)
         T = eos - bos
@@ -555,6 +788,8 @@ def causal_conv1d_states_fwd_kernel(
     m_w = (o_w >= 0) & (o_w < W)
 
     b_x = tl.load(x + o_t * D + o_d[:, None], mask=(m_t & m_d[:, None]), other=0)
+    if HAS_MASK:
+        b_x = (b_x * tl.load(mask + o_t, mask=m_t, other=0)[None, :]).to(b_x.dtype)
     if USE_INITIAL_STATE:
         if T < BW:
             o_c = W - (BW - T) + tl.arange(0, BW)
@@ -571,6 +806,7 @@ def causal_conv1d_update_states(
     state_len: int,
     initial_state: Optional[torch.Tensor] = None,
     cu_seqlens: Optional[torch.Tensor] = None,
+    mask: Optional[torch.Tensor] = None,
 ) -> torch.Tensor:
     B, T, D, W = *x.shape, state_len
     N = len(cu_seqlens) - 1 if cu_seqlens is not None else B
@@ -578,11 +814,12 @@ def causal_conv1d_update_states(
     final_state = torch.empty(N, D, W, dtype=x.dtype, device=x.device)
     BD = min(triton.next_power_of_2(D), 256)
     BW = triton.next_power_of_2(W)
-    grid = (triton.cdiv(D, BD), N)
+    grid = (triton.cdiv(D, BD) * N,)
     causal_conv1d_states_fwd_kernel[grid](
         x=x,
         initial_state=initial_state,
         final_state=final_state,
+        mask=mask,
         cu_seqlens=cu_seqlens,
         T=T,
         D=D,
@@ -608,12 +845,27 @@ def causal_conv1d_update(
     *_, D = x.shape
     N = x.numel() // D
     W = weight.shape[1] if weight is not None else None
-    BD = 8
     BW = triton.next_power_of_2(W)
+    # the autotuner needs a real tensor to restore; a zero cache is the same as having no history
+    if cache is None:
+        cache = x.new_zeros(N, D, W)
 
     y = torch.empty_like(x)
-    # NOTE: autotuning is disabled as cache is updated in-place
-    def grid(meta): return (triton.cdiv(D, meta['BD']), N)
+    def grid(meta): return (triton.cdiv(D, meta['BD']) * N,)
+    # the kernel sizes used in practice get a fully unrolled kernel without the [BD, BW] reduction
+    if W in (3, 4):
+        causal_conv1d_update_short_kernel[grid](
+            x=x,
+            cache=cache,
+            residual=residual,
+            y=y,
+            weight=weight,
+            bias=bias,
+            D=D,
+            W=W,
+            ACTIVATION=activation,
+        )
+        return y.view(shape), cache
     causal_conv1d_update_kernel[grid](
         x=x,
         cache=cache,
@@ -623,10 +875,8 @@ def causal_conv1d_update(
         bias=bias,
         D=D,
         W=W,
-        BD=BD,
         BW=BW,
         ACTIVATION=activation,
-        num_warps=STATIC_WARPS,
     )
     return y.view(shape), cache
 
@@ -645,10 +895,15 @@ class CausalConv1dFunction(torch.autograd.Function):
         output_final_state: Optional[bool] = False,
         activation: Optional[str] = None,
         cu_seqlens: Optional[torch.Tensor] = None,
+        mask: Optional[torch.Tensor] = None,
     ):
         ctx.activation = activation
         ctx.cu_seqlens = cu_seqlens
-        ctx.save_for_backward(x, weight, bias, residual, initial_state)
+        ctx.mask = mask
+        pre_act = None
+        if activation is not None and any(ctx.needs_input_grad):
+            pre_act = torch.empty_like(x)
+        ctx.save_for_backward(x, weight, bias, residual, initial_state, pre_act)
         y, final_state = causal_conv1d_fwd(
             x=x,
             weight=weight,
@@ -658,13 +913,15 @@ class CausalConv1dFunction(torch.autograd.Function):
             output_final_state=output_final_state,
             activation=activation,
             cu_seqlens=cu_seqlens,
+            pre_act=pre_act,
+            mask=mask,
         )
         return y, final_state
 
     @staticmethod
     @input_guard
     def backward(ctx, dy: torch.Tensor, dht: Optional[torch.Tensor] = None):
-        x, weight, bias, residual, initial_state = ctx.saved_tensors
+        x, weight, bias, residual, initial_state, pre_act = ctx.saved_tensors
         dx, dw, db, dr, dh0 = causal_conv1d_bwd(
             x=x,
             dy=dy,
@@ -675,8 +932,11 @@ class CausalConv1dFunction(torch.autograd.Function):
             initial_state=initial_state,
             activation=ctx.activation,
             cu_seqlens=ctx.cu_seqlens,
+            y=pre_act,
+            mask=ctx.mask,
+            output_dh0=ctx.needs_input_grad[4],
         )
-        return dx, dw, db, dr, dh0, None, None, None
+        return dx, dw, db, dr, dh0, None, None, None, None
 
 
 @input_guard
@@ -690,6 +950,7 @@ def causal_conv1d(
     activation: Optional[str] = None,
     backend: Optional[str] = 'triton',
     cu_seqlens: Optional[torch.Tensor] = None,
+    mask: Optional[torch.Tensor] = None,
     **kwargs,
 ):
     """
@@ -721,12 +982,19 @@ def causal_conv1d(
             Default: `'triton'`.
         cu_seqlens (Optional[torch.Tensor]):
             Cumulative sequence lengths (optional)
+        mask (Optional[torch.Tensor]):
+            Mask of shape [B, T] zeroing out padded positions of `x` before the convolution.
+            The Triton backend applies it on the fly instead of materializing the masked input.
+            Can not be used together with `cu_seqlens`. Default: `None`.
 
     Returns:
         Tuple of (output, final_state).
         If `output_final_state` is `False`, the final state is `None`.
     """
 
+    if mask is not None and cu_seqlens is not None:
+        raise ValueError("`mask` and `cu_seqlens` cannot be provided at the same time")
+
     if backend == 'triton':
         y, final_state = CausalConv1dFunction.apply(
             x,
@@ -737,9 +1005,12 @@ def causal_conv1d(
             output_final_state,
             activation,
             cu_seqlens,
+            mask,
         )
         return y, final_state
 
+    if mask is not None:
+        x = x * mask.unsqueeze(-1)
     B, _, D, W = *x.shape, weight.shape[-1]
     N = B if cu_seqlens is None else len(cu_seqlens) - 1
     x = rearrange(x, 'b t d -> b d t')
@@ -753,7 +1024,7 @@ def causal_conv1d(
     # [B, T]
     seq_idx = kwargs.get('seq_idx', None)
     if cu_seqlens is not None and seq_idx is None:
-        seq_idx = prepare_sequence_ids(cu_seqlens).to(torch.int32).unsqueeze(0)
+        seq_idx = prepare_seq_idx(cu_seqlens)
 
     # equivalent to:
     # y = _conv_forward(x, weight, bias)[..., :x.shape[-1]]
@@ -763,6 +1034,10 @@ def causal_conv1d(
     cache, initial_state = initial_state, None
     if cache is not None:
         # To make causal-conv1d happy
+        # NOTE: `x` is channel-last here, so causal-conv1d wants a channel-last initial state as well.
+        # The copy only touches the last `W-1` columns of the cache, and keeping the cache itself in `[N, W, D]`
+        # is not an option: `@input_guard` would make it contiguous again, and the Triton decoding kernels
+        # rely on the `[N, D, W]` layout to update it in-place.
         initial_state = (
             cache[:, :, -(W-1):]   # [N, D, W-1]
             .transpose(1, 2).contiguous()  # [N, W-1, D] and stride(2)==1
@@ -897,7 +1172,10 @@ class ShortConvolution(nn.Conv1d):
         if mask is not None:
             if cu_seqlens is not None:
                 raise ValueError("`mask` and `cu_seqlens` cannot be provided at the same time")
-            x = x.mul_(mask.unsqueeze(-1))
+            # the Triton kernels apply the mask on the fly, so `x` only needs to be masked for the other paths
+            if self.backend != 'triton' or B * T == N:
+                x = x.mul_(mask.unsqueeze(-1))
+                mask = None
 
         # in decoding phase, the cache (if provided) is updated inplace
         if B * T == N:
@@ -935,6 +1213,7 @@ class ShortConvolution(nn.Conv1d):
             activation=self.activation,
             backend=self.backend,
             cu_seqlens=cu_seqlens,
+            mask=mask,
             **kwargs
         )
 
@@ -984,24 +1263,39 @@ class ShortConvolution(nn.Conv1d):
         return self.hidden_size * self.kernel_size
 
 
-def fft_conv(u, k, dropout_mask, gelu=True, k_rev=None):
-    seqlen = u.shape[-1]
-    fft_size = 2 * seqlen
+def fft_kernel(k, fft_size, k_rev=None):
     k_f = torch.fft.rfft(k, n=fft_size) / fft_size
     if k_rev is not None:
         k_rev_f = torch.fft.rfft(k_rev, n=fft_size) / fft_size
         k_f = k_f + k_rev_f.conj()
-    u_f = torch.fft.rfft(u.to(dtype=k.dtype), n=fft_size)
+    return k_f
+
+
+def fft_conv(u, k, dropout_mask, gelu=True, k_rev=None, dim=-1, k_f=None):
+    # `dim` is the time axis of `u`, the kernel is always laid out as `[..., D, L]`
+    # `k_f` optionally passes in the spectrum of `k` (see `fft_kernel`) precomputed by the caller, `k` is unused then
+    # callers reusing one kernel across calls, e.g., `LongConvolution`, keep that spectrum cached themselves
+    seqlen = u.shape[dim]
+    fft_size = 2 * seqlen
+    if k_f is None:
+        k_f = fft_kernel(k, fft_size, k_rev)
+    u_f = torch.fft.rfft(u.to(dtype=k_f.real.dtype), n=fft_size, dim=dim)
 
-    if len(u.shape) > 3:
-        k_f = k_f.unsqueeze(1)
-    y = torch.fft.irfft(u_f * k_f, n=fft_size, norm="forward")[..., :seqlen]
+    if dim % u.ndim == u.ndim - 1:
+        if len(u.shape) > 3:
+            k_f = k_f.unsqueeze(1)
+    else:
+        # transforming along the time axis of `u` in place saves transposing the inputs and the outputs,
+        # only the (much smaller) kernel spectrum is moved onto the layout of `u`
+        k_f = k_f.transpose(-1, -2)
+    y = torch.fft.irfft(u_f * k_f, n=fft_size, dim=dim, norm="forward").narrow(dim, 0, seqlen)
 
-    out = y + u
+    # `y` is a fresh tensor, so the skip connection can be added in-place
+    out = y.add_(u)
     if gelu:
         out = F.gelu(out)
     if dropout_mask is not None:
-        return (out * rearrange(dropout_mask, "b H -> b H 1")).to(dtype=u.dtype)
+        return (out * dropout_mask.unsqueeze(dim)).to(dtype=u.dtype)
     else:
         return out.to(dtype=u.dtype)
 
@@ -1035,6 +1329,17 @@ class LongConvolution(nn.Module):
         super().__init__()
         self.hidden_size = hidden_size
         self.filter = nn.Parameter(torch.randn(self.hidden_size, max_len), requires_grad=True)
+        self._filter_fft = None
+
+    def filter_fft(self, fft_size: int) -> torch.Tensor:
+        if torch.is_grad_enabled() and self.filter.requires_grad:
+            return fft_kernel(self.filter, fft_size)
+        # each layer keeps the spectrum of its own filter, recomputed only when
+        # the filter is updated in-place (version counter) or its storage is replaced
+        key = (fft_size, self.filter.data_ptr(), self.filter._version)
+        if self._filter_fft is None or self._filter_fft[0] != key:
+            self._filter_fft = (key, fft_kernel(self.filter, fft_size))
+        return self._filter_fft[1]
 
     def forward(self, x: torch.Tensor, *args, **kwargs):
         """
@@ -1044,9 +1349,8 @@ class LongConvolution(nn.Module):
         Returns:
             y: [batch_size, seq_len, hidden_size] tensor
         """
-        x = x.transpose(1, 2)
-        y = fft_conv(x, self.filter, dropout_mask=None, gelu=False)
-        y = y.transpose(1, 2)
+        k_f = self.filter_fft(2 * x.shape[1])
+        y = fft_conv(x, self.filter, dropout_mask=None, gelu=False, dim=1, k_f=k_f)
         return y.to(dtype=x.dtype)
 
 
@@ -1066,9 +1370,11 @@ class PositionalEmbedding(nn.Module):
         w = 2 * math.pi * t_rescaled / seq_len  # 1, L, 1
 
         f = torch.linspace(1e-4, bands - 1, bands)[None, None]
-        z = torch.exp(-1j * f * w)
-        z = torch.cat([t, z.real, z.imag], dim=-1)
-        self.z = nn.Parameter(z, requires_grad=False)
+        # real and imaginary parts of exp(-1j * f * w), built without going through a complex tensor
+        angle = f * w
+        z = torch.cat([t, torch.cos(angle), -torch.sin(angle)], dim=-1)
+        # kept under the same name in the state dict, so existing checkpoints still load
+        self.register_buffer('z', z)
 
     def forward(self, L):
         return self.z[:, :L]
@@ -1123,10 +1429,21 @@ class ImplicitLongConvolution(nn.Module):
             torch.nn.ReLU(),
             nn.Linear(d_hidden, hidden_size),
         )
+        self._filter_fft = None
 
     def filter(self, seq_len: int, *args, **kwargs):
         return self.mlp(self.pos_emb(seq_len)).transpose(1, 2)
 
+    def filter_fft(self, seq_len: int, fft_size: int) -> torch.Tensor:
+        if torch.is_grad_enabled() and any(p.requires_grad for p in self.mlp.parameters()):
+            return fft_kernel(self.filter(seq_len), fft_size)
+        # the implicit filter is a pure function of the MLP weights and the positional embeddings,
+        # so its spectrum is reused until one of them is updated in-place or moved
+        key = (seq_len, fft_size) + tuple((t.data_ptr(), t._version) for t in (self.pos_emb.z, *self.mlp.parameters()))
+        if self._filter_fft is None or self._filter_fft[0] != key:
+            self._filter_fft = (key, fft_kernel(self.filter(seq_len), fft_size))
+        return self._filter_fft[1]
+
     def forward(self, x: torch.Tensor, *args, **kwargs):
         """
         Args:
@@ -1135,9 +1452,6 @@ class ImplicitLongConvolution(nn.Module):
         Returns:
             y: [batch_size, seq_len, hidden_size] tensor
         """
-        x = x.transpose(1, 2)
-        k = self.filter(x.shape[-1])
-        y = fft_conv(x, k, dropout_mask=None, gelu=False)
-
-        y = y.transpose(1, 2)
+        k_f = self.filter_fft(x.shape[1], 2 * x.shape[1])
+        y = fft_conv(x, None, dropout_mask=None, gelu=False, dim=1, k_f=k_f)
         return y.to(dtype=x.dtype)
@@ -3,7 +3,6 @@
 
 from __future__ import annotations
 
-import math
 from typing import Optional
 
 import torch
@@ -42,6 +41,7 @@ def layer_norm_gated_fwd_kernel(
     rstd,  # pointer to the 1/std
     eps,  # epsilon to avoid division by zero
     T,  # number of rows in x
+    G: tl.constexpr,  # number of groups
     D: tl.constexpr,  # number of columns in x
     BT: tl.constexpr,
     BD: tl.constexpr,
@@ -80,14 +80,23 @@ def layer_norm_gated_fwd_kernel(
     p_rstd = tl.make_block_ptr(rstd, (T,), (1,), (i_t * BT,), (BT,), (0,))
     tl.store(p_rstd, b_rstd.to(p_rstd.dtype.element_ty), boundary_check=(0,))
 
-    if HAS_WEIGHT:
-        b_w = tl.load(w + o_d, mask=m_d).to(tl.float32)
-    if HAS_BIAS:
-        b_b = tl.load(b + o_d, mask=m_d).to(tl.float32)
+    if G == 1:
+        # a single group shares one `[BD]` weight/bias vector across all rows
+        if HAS_WEIGHT:
+            b_w = tl.load(w + o_d, mask=m_d).to(tl.float32)[None, :]
+        if HAS_BIAS:
+            b_b = tl.load(b + o_d, mask=m_d).to(tl.float32)[None, :]
+    else:
+        # rows cycle through the groups, so each row gathers the weight/bias of its own group
+        o_g = (i_t * BT + tl.arange(0, BT)) % G
+        if HAS_WEIGHT:
+            b_w = tl.load(w + o_g[:, None] * D + o_d[None, :], mask=m_d[None, :]).to(tl.float32)
+        if HAS_BIAS:
+            b_b = tl.load(b + o_g[:, None] * D + o_d[None, :], mask=m_d[None, :]).to(tl.float32)
     b_x_hat = (b_x - b_mean[:, None]) * b_rstd[:, None] if not IS_RMS_NORM else b_x * b_rstd[:, None]
-    b_y = b_x_hat * b_w[None, :] if HAS_WEIGHT else b_x_hat
+    b_y = b_x_hat * b_w if HAS_WEIGHT else b_x_hat
     if HAS_BIAS:
-        b_y = b_y + b_b[None, :]
+        b_y = b_y + b_b
 
     # swish/sigmoid output gate
     p_g = tl.make_block_ptr(g, (T, D), (D, 1), (i_t * BT, 0), (BT, BD), (1, 0))
@@ -129,6 +138,7 @@ def layer_norm_gated_fwd_kernel1(
     mean,  # pointer to the mean
     rstd,  # pointer to the 1/std
     eps,  # epsilon to avoid division by zero
+    G: tl.constexpr,  # number of groups
     D: tl.constexpr,  # number of columns in x
     BD: tl.constexpr,
     ACTIVATION: tl.constexpr,
@@ -139,6 +149,7 @@ def layer_norm_gated_fwd_kernel1(
     HAS_BIAS: tl.constexpr
 ):
     i_t = tl.program_id(0)
+    i_g = i_t % G
     x += i_t * D
     y += i_t * D
     g += i_t * D
@@ -166,9 +177,9 @@ def layer_norm_gated_fwd_kernel1(
     tl.store(rstd + i_t, b_rstd)
 
     if HAS_WEIGHT:
-        b_w = tl.load(w + o_d, mask=m_d).to(tl.float32)
+        b_w = tl.load(w + i_g * D + o_d, mask=m_d).to(tl.float32)
     if HAS_BIAS:
-        b_b = tl.load(b + o_d, mask=m_d).to(tl.float32)
+        b_b = tl.load(b + i_g * D + o_d, mask=m_d).to(tl.float32)
     b_x_hat = (b_x - b_mean) * b_rstd if not IS_RMS_NORM else b_x * b_rstd
     b_y = b_x_hat * b_w if HAS_WEIGHT else b_x_hat
     if HAS_BIAS:
@@ -219,10 +230,12 @@ def layer_norm_gated_bwd_kernel(
     rstd,
     T,
     BS,
+    G: tl.constexpr,
     D: tl.constexpr,
     BT: tl.constexpr,
     BD: tl.constexpr,
     NB: tl.constexpr,
+    GS: tl.constexpr,
     ACTIVATION: tl.constexpr,
     IS_RMS_NORM: tl.constexpr,
     STORE_DRESIDUAL: tl.constexpr,
@@ -232,31 +245,33 @@ def layer_norm_gated_bwd_kernel(
     RECOMPUTE_OUTPUT: tl.constexpr,
 ):
     i_s = tl.program_id(0)
+    i_g, i_sg = i_s // GS, i_s % GS
+
     o_d = tl.arange(0, BD)
     m_d = o_d < D
     if HAS_WEIGHT:
-        b_w = tl.load(w + o_d, mask=m_d).to(tl.float32)
+        b_w = tl.load(w + i_g * D + o_d, mask=m_d).to(tl.float32)
         b_dw = tl.zeros((BT, BD), dtype=tl.float32)
     if HAS_BIAS:
-        b_b = tl.load(b + o_d, mask=m_d, other=0.0).to(tl.float32)
+        b_b = tl.load(b + i_g * D + o_d, mask=m_d, other=0.0).to(tl.float32)
         b_db = tl.zeros((BT, BD), dtype=tl.float32)
 
-    T = min(i_s * BS + BS, T)
-    for i_t in range(i_s * BS, T, BT):
-        p_x = tl.make_block_ptr(x, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
-        p_g = tl.make_block_ptr(g, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
-        p_dy = tl.make_block_ptr(dy, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
-        p_dx = tl.make_block_ptr(dx, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
-        p_dg = tl.make_block_ptr(dg, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
+    T = min(i_sg * BS + BS, T // G)
+    for i_t in range(i_sg * BS, T, BT):
+        p_x = tl.make_block_ptr(x + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
+        p_g = tl.make_block_ptr(g + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
+        p_dy = tl.make_block_ptr(dy + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
+        p_dx = tl.make_block_ptr(dx + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
+        p_dg = tl.make_block_ptr(dg + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
         # [BT, BD]
         b_x = tl.load(p_x, boundary_check=(0, 1)).to(tl.float32)
         b_g = tl.load(p_g, boundary_check=(0, 1)).to(tl.float32)
         b_dy = tl.load(p_dy, boundary_check=(0, 1)).to(tl.float32)
 
         if not IS_RMS_NORM:
-            p_mean = tl.make_block_ptr(mean, (T,), (1,), (i_t,), (BT,), (0,))
+            p_mean = tl.make_block_ptr(mean + i_g, (T,), (G,), (i_t,), (BT,), (0,))
             b_mean = tl.load(p_mean, boundary_check=(0,))
-        p_rstd = tl.make_block_ptr(rstd, (T,), (1,), (i_t,), (BT,), (0,))
+        p_rstd = tl.make_block_ptr(rstd + i_g, (T,), (G,), (i_t,), (BT,), (0,))
         b_rstd = tl.load(p_rstd, boundary_check=(0,))
         # Compute dx
         b_xhat = (b_x - b_mean[:, None]) * b_rstd[:, None] if not IS_RMS_NORM else b_x * b_rstd[:, None]
@@ -266,7 +281,7 @@ def layer_norm_gated_bwd_kernel(
         if HAS_BIAS:
             b_y = b_y + b_b[None, :]
         if RECOMPUTE_OUTPUT:
-            p_y = tl.make_block_ptr(y, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
+            p_y = tl.make_block_ptr(y + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
             tl.store(p_y, b_y.to(p_y.dtype.element_ty), boundary_check=(0, 1))
 
         b_sigmoid_g = tl.sigmoid(b_g)
@@ -296,12 +311,12 @@ def layer_norm_gated_bwd_kernel(
             b_c1 = tl.sum(b_xhat * b_wdy, axis=1) / D
             b_dx = (b_wdy - b_xhat * b_c1[:, None]) * b_rstd[:, None]
         if HAS_DRESIDUAL:
-            p_dres = tl.make_block_ptr(dresidual, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
+            p_dres = tl.make_block_ptr(dresidual + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
             b_dres = tl.load(p_dres, boundary_check=(0, 1)).to(tl.float32)
             b_dx += b_dres
         # Write dx
         if STORE_DRESIDUAL:
-            p_dres_in = tl.make_block_ptr(dresidual_in, (T, D), (D, 1), (i_t, 0), (BT, BD), (1, 0))
+            p_dres_in = tl.make_block_ptr(dresidual_in + i_g * D, (T, D), (G*D, 1), (i_t, 0), (BT, BD), (1, 0))
             tl.store(p_dres_in, b_dx.to(p_dres_in.dtype.element_ty), boundary_check=(0, 1))
 
         tl.store(p_dx, b_dx.to(p_dx.dtype.element_ty), boundary_check=(0, 1))
@@ -344,8 +359,10 @@ def layer_norm_gated_bwd_kernel1(
     rstd,
     T,
     BS,
+    G: tl.constexpr,
     D: tl.constexpr,
     BD: tl.constexpr,
+    GS: tl.constexpr,
     ACTIVATION: tl.constexpr,
     IS_RMS_NORM: tl.constexpr,
     STORE_DRESIDUAL: tl.constexpr,
@@ -355,31 +372,22 @@ def layer_norm_gated_bwd_kernel1(
     RECOMPUTE_OUTPUT: tl.constexpr,
 ):
     i_s = tl.program_id(0)
+    i_g, i_sg = i_s // GS, i_s % GS
+
     o_d = tl.arange(0, BD)
     mask = o_d < D
-    x += i_s * BS * D
-    g += i_s * BS * D
-    if HAS_DRESIDUAL:
-        dresidual += i_s * BS * D
-    if STORE_DRESIDUAL:
-        dresidual_in += i_s * BS * D
-    dy += i_s * BS * D
-    dx += i_s * BS * D
-    dg += i_s * BS * D
-    if RECOMPUTE_OUTPUT:
-        y += i_s * BS * D
     if HAS_WEIGHT:
-        b_w = tl.load(w + o_d, mask=mask).to(tl.float32)
+        b_w = tl.load(w + i_g * D + o_d, mask=mask).to(tl.float32)
         b_dw = tl.zeros((BD,), dtype=tl.float32)
     if HAS_BIAS:
-        b_b = tl.load(b + o_d, mask=mask, other=0.0).to(tl.float32)
+        b_b = tl.load(b + i_g * D + o_d, mask=mask, other=0.0).to(tl.float32)
         b_db = tl.zeros((BD,), dtype=tl.float32)
 
-    for i_t in range(i_s * BS, min(i_s * BS + BS, T)):
+    for i_t in range(i_sg * BS * G + i_g, min((i_sg * BS + BS) * G + i_g, T), G):
         # Load data to SRAM
-        b_x = tl.load(x + o_d, mask=mask, other=0).to(tl.float32)
-        b_g = tl.load(g + o_d, mask=mask, other=0).to(tl.float32)
-        b_dy = tl.load(dy + o_d, mask=mask, other=0).to(tl.float32)
+        b_x = tl.load(x + i_t * D + o_d, mask=mask, other=0).to(tl.float32)
+        b_g = tl.load(g + i_t * D + o_d, mask=mask, other=0).to(tl.float32)
+        b_dy = tl.load(dy + i_t * D + o_d, mask=mask, other=0).to(tl.float32)
 
         if not IS_RMS_NORM:
             b_mean = tl.load(mean + i_t)
@@ -392,7 +400,7 @@ def layer_norm_gated_bwd_kernel1(
         if HAS_BIAS:
             b_y = b_y + b_b
         if RECOMPUTE_OUTPUT:
-            tl.store(y + o_d, b_y, mask=mask)
+            tl.store(y + i_t * D + o_d, b_y, mask=mask)
 
         b_sigmoid_g = tl.sigmoid(b_g)
         if ACTIVATION == 'swish':
@@ -418,25 +426,14 @@ def layer_norm_gated_bwd_kernel1(
             b_c1 = tl.sum(b_xhat * b_wdy, axis=0) / D
             b_dx = (b_wdy - b_xhat * b_c1) * b_rstd
         if HAS_DRESIDUAL:
-            b_dres = tl.load(dresidual + o_d, mask=mask, other=0).to(tl.float32)
+            b_dres = tl.load(dresidual + i_t * D + o_d, mask=mask, other=0).to(tl.float32)
             b_dx += b_dres
         # Write dx
         if STORE_DRESIDUAL:
-            tl.store(dresidual_in + o_d, b_dx, mask=mask)
-        tl.store(dx + o_d, b_dx, mask=mask)
-        tl.store(dg + o_d, b_dg, mask=mask)
+            tl.store(dresidual_in + i_t * D + o_d, b_dx, mask=mask)
+        tl.store(dx + i_t * D + o_d, b_dx, mask=mask)
+        tl.store(dg + i_t * D + o_d, b_dg, mask=mask)
 
-        x += D
-        g += D
-        if HAS_DRESIDUAL:
-            dresidual += D
-        if STORE_DRESIDUAL:
-            dresidual_in += D
-        if RECOMPUTE_OUTPUT:
-            y += D
-        dy += D
-        dx += D
-        dg += D
     if HAS_WEIGHT:
         tl.store(dw + i_s * D + o_d, b_dw, mask=mask)
     if HAS_BIAS:
@@ -453,17 +450,18 @@ def layer_norm_gated_fwd(
     residual: torch.Tensor = None,
     out_dtype: torch.dtype = None,
     residual_dtype: torch.dtype = None,
-    is_rms_norm: bool = False
+    is_rms_norm: bool = False,
+    num_groups: int = 1
 ):
     if residual is not None:
         residual_dtype = residual.dtype
-    T, D = x.shape
+    T, D, G = *x.shape, num_groups
     if residual is not None:
         assert residual.shape == (T, D)
     if weight is not None:
-        assert weight.shape == (D,)
+        assert weight.shape == (G * D,)
     if bias is not None:
-        assert bias.shape == (D,)
+        assert bias.shape == (G * D,)
     # allocate output
     y = torch.empty_like(x, dtype=x.dtype if out_dtype is None else out_dtype)
     if residual is not None or (residual_dtype is not None and residual_dtype != x.dtype):
@@ -494,6 +492,7 @@ def layer_norm_gated_fwd(
             rstd=rstd,
             eps=eps,
             T=T,
+            G=G,
             D=D,
             BD=BD,
             NB=NB,
@@ -512,6 +511,7 @@ def layer_norm_gated_fwd(
             mean=mean,
             rstd=rstd,
             eps=eps,
+            G=G,
             D=D,
             BD=BD,
             ACTIVATION=activation,
@@ -536,15 +536,16 @@ def layer_norm_gated_bwd(
     is_rms_norm: bool = False,
     x_dtype: torch.dtype = None,
     recompute_output: bool = False,
+    num_groups: int = 1,
 ):
-    T, D = x.shape
+    T, D, G = *x.shape, num_groups
     assert dy.shape == (T, D)
     if dresidual is not None:
         assert dresidual.shape == (T, D)
     if weight is not None:
-        assert weight.shape == (D,)
+        assert weight.shape == (G * D,)
     if bias is not None:
-        assert bias.shape == (D,)
+        assert bias.shape == (G * D,)
     # allocate output
     dx = torch.empty_like(x) if x_dtype is None else torch.empty(T, D, dtype=x_dtype, device=x.device)
     dg = torch.empty_like(g) if x_dtype is None else torch.empty(T, D, dtype=x_dtype, device=x.device)
@@ -556,8 +557,10 @@ def layer_norm_gated_bwd(
     BD = min(MAX_FUSED_SIZE, triton.next_power_of_2(D))
     if D > BD:
         raise RuntimeError("This layer norm doesn't support feature dim >= 64KB.")
-    NS = get_multiprocessor_count(x.device.index)
-    BS = math.ceil(T / NS)
+    # each program handles one group only
+    NS = triton.cdiv(get_multiprocessor_count(x.device.index), G) * G
+    BS = triton.cdiv(T, NS)
+    GS = NS // G
 
     dw = torch.empty((NS, D), dtype=torch.float, device=weight.device) if weight is not None else None
     db = torch.empty((NS, D), dtype=torch.float, device=bias.device) if bias is not None else None
@@ -581,10 +584,12 @@ def layer_norm_gated_bwd(
             mean=mean,
             rstd=rstd,
             T=T,
-            D=D,
             BS=BS,
+            G=G,
+            D=D,
             BD=BD,
             NB=NB,
+            GS=GS,
             ACTIVATION=activation,
             IS_RMS_NORM=is_rms_norm,
             STORE_DRESIDUAL=dresidual_in is not None,
@@ -606,15 +611,17 @@ def layer_norm_gated_bwd(
             mean=mean,
             rstd=rstd,
             T=T,
-            D=D,
             BS=BS,
+            G=G,
+            D=D,
             BD=BD,
+            GS=GS,
             ACTIVATION=activation,
             IS_RMS_NORM=is_rms_norm,
             STORE_DRESIDUAL=dresidual_in is not None,
         )
-    dw = dw.sum(0).to(weight.dtype) if weight is not None else None
-    db = db.sum(0).to(bias.dtype) if bias is not None else None
+    dw = dw.view(G, -1, D).sum(1).to(weight).view_as(weight) if weight is not None else None
+    db = db.view(G, -1, D).sum(1).to(bias).view_as(bias) if bias is not None else None
     # Don't need to compute dresidual_in separately in this case
     if has_residual and dx.dtype == x.dtype:
         dresidual_in = dx
@@ -637,15 +644,19 @@ class LayerNormGatedFunction(torch.autograd.Function):
         prenorm: bool = False,
         residual_in_fp32: bool = False,
         is_rms_norm: bool = False,
+        num_groups: int = 1
     ):
         x_shape_og = x.shape
         g_shape_og = g.shape
+
+        if x.shape[-1] % num_groups != 0:
+            raise ValueError('num_channels must be divisible by num_groups')
         # reshape input data into 2D tensor
-        x = x.reshape(-1, x.shape[-1])
-        g = g.reshape(-1, g.shape[-1])
+        x = x.reshape(-1, (x.shape[-1] // num_groups))
+        g = g.reshape_as(x)
         if residual is not None:
             assert residual.shape == x_shape_og
-            residual = residual.reshape(-1, residual.shape[-1])
+            residual = residual.reshape_as(x)
         residual_dtype = (
             residual.dtype
             if residual is not None
@@ -660,7 +671,8 @@ class LayerNormGatedFunction(torch.autograd.Function):
             eps=eps,
             residual=residual,
             residual_dtype=residual_dtype,
-            is_rms_norm=is_rms_norm
+            is_rms_norm=is_rms_norm,
+            num_groups=num_groups
         )
         ctx.save_for_backward(residual_out, g, weight, bias, mean, rstd)
         ctx.x_shape_og = x_shape_og
@@ -668,6 +680,7 @@ class LayerNormGatedFunction(torch.autograd.Function):
         ctx.activation = activation
         ctx.eps = eps
         ctx.is_rms_norm = is_rms_norm
+        ctx.num_groups = num_groups
         ctx.has_residual = residual is not None
         ctx.prenorm = prenorm
         ctx.x_dtype = x.dtype
@@ -678,11 +691,11 @@ class LayerNormGatedFunction(torch.autograd.Function):
     @input_guard
     def backward(ctx, dy, *args):
         x, g, weight, bias, mean, rstd = ctx.saved_tensors
-        dy = dy.reshape(-1, dy.shape[-1])
+        dy = dy.reshape(-1, (dy.shape[-1] // ctx.num_groups))
         assert dy.shape == x.shape
         if ctx.prenorm:
             dresidual = args[0]
-            dresidual = dresidual.reshape(-1, dresidual.shape[-1])
+            dresidual = dresidual.reshape(-1, x.shape[-1])
             assert dresidual.shape == x.shape
         else:
             dresidual = None
@@ -700,6 +713,7 @@ class LayerNormGatedFunction(torch.autograd.Function):
             has_residual=ctx.has_residual,
             is_rms_norm=ctx.is_rms_norm,
             x_dtype=ctx.x_dtype,
+            num_groups=ctx.num_groups,
         )
         return (
             dx.reshape(ctx.x_shape_og),
@@ -712,6 +726,7 @@ class LayerNormGatedFunction(torch.autograd.Function):
             None,
             None,
             None,
+            None,
         )
 
 
@@ -868,6 +883,34 @@ def rms_norm_gated(
     )
 
 
+def group_norm_gated(
+    x: torch.Tensor,
+    g: torch.Tensor,
+    weight: torch.Tensor,
+    bias: torch.Tensor,
+    activation: str = 'swish',
+    residual: Optional[torch.Tensor] = None,
+    prenorm: bool = False,
+    residual_in_fp32: bool = False,
+    eps: float = 1e-6,
+    is_rms_norm: bool = False,
+    num_groups: int = 1
+):
+    return LayerNormGatedFunction.apply(
+        x,
+        g,
+        weight,
+        bias,
+        activation,
+        residual,
+        eps,
+        prenorm,
+        residual_in_fp32,
+        is_rms_norm,
+        num_groups
+    )
+
+
 def layer_norm_swish_gate_linear(
     x: torch.Tensor,
     g: torch.Tensor,
@@ -1054,6 +1097,85 @@ class FusedRMSNormGated(nn.Module):
         )
 
 
+class FusedGroupNormGated(nn.Module):
+
+    def __init__(
+        self,
+        num_groups: int,
+        hidden_size: int,
+        elementwise_affine: bool = True,
+        bias: bool = False,
+        activation: str = 'swish',
+        eps: float = 1e-5,
+        is_rms_norm: bool = False,
+        device: Optional[torch.device] = None,
+        dtype: Optional[torch.dtype] = None,
+    ) -> FusedGroupNormGated:
+        factory_kwargs = {"device": device, "dtype": dtype}
+        super().__init__()
+
+        if hidden_size % num_groups != 0:
+            raise ValueError('num_channels must be divisible by num_groups')
+
+        self.num_groups = num_groups
+        self.hidden_size = hidden_size
+        self.elementwise_affine = elementwise_affine
+        self.eps = eps
+        self.activation = activation
+        self.is_rms_norm = is_rms_norm
+
+        if self.activation not in ['swish', 'silu', 'sigmoid']:
+            raise ValueError(f"Unsupported activation: {self.activation}")
+
+        self.register_parameter("weight", None)
+        self.register_parameter("bias", None)
+        if elementwise_affine:
+            self.weight = nn.Parameter(torch.empty(hidden_size, **factory_kwargs))
+            if bias:
+                self.bias = nn.Parameter(torch.empty(hidden_size, **factory_kwargs))
+
+        self.reset_parameters()
+
+    def reset_parameters(self):
+        if self.elementwise_affine:
+            nn.init.ones_(self.weight)
+            if self.bias is not None:
+                nn.init.zeros_(self.bias)
+
+    def __repr__(self) -> str:
+        s = f"{self.__class__.__name__}({self.num_groups}, {self.hidden_size}"
+        if not self.elementwise_affine:
+            s += f", elementwise_affine={self.elementwise_affine}"
+        if self.is_rms_norm:
+            s += f", is_rms_norm={self.is_rms_norm}"
+        s += f", eps={self.eps}"
+        s += f", activation={self.activation}"
+        s += ")"
+        return s
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        g: torch.Tensor,
+        residual: Optional[torch.Tensor] = None,
+        prenorm: bool = False,
+        residual_in_fp32: bool = False
+    ) -> torch.Tensor:
+        return group_norm_gated(
+            x,
+            g,
+            self.weight,
+            self.bias,
+            self.activation,
+            residual=residual,
+            eps=self.eps,
+            prenorm=prenorm,
+            residual_in_fp32=residual_in_fp32,
+            is_rms_norm=self.is_rms_norm,
+            num_groups=self.num_groups
+        )
+
+
 class FusedLayerNormSwishGate(FusedLayerNormGated):
 
     def __init__(
@@ -366,10 +366,11 @@ def token_shift_fwd(
     x: torch.Tensor,
     cu_seqlens: Optional[torch.Tensor] = None,
     cache: Optional[torch.Tensor] = None,
-    output_cache: bool = False
+    output_cache: bool = False,
+    out: Optional[torch.Tensor] = None
 ) -> torch.Tensor:
     B, T, D = x.shape
-    y = torch.empty_like(x)
+    y = torch.empty_like(x) if out is None else out
     use_short_kernel = T <= 4096
 
     if cu_seqlens is not None:
@@ -488,8 +489,9 @@ class TokenShift(torch.autograd.Function):
     @staticmethod
     @input_guard
     def forward(ctx, x: torch.Tensor, cu_seqlens: Optional[torch.Tensor] = None,
-                cache: Optional[torch.Tensor] = None, output_cache: bool = False):
-        output, N, T, use_short_kernel, cache_out = token_shift_fwd(x, cu_seqlens, cache, output_cache)
+                cache: Optional[torch.Tensor] = None, output_cache: bool = False,
+                out: Optional[torch.Tensor] = None):
+        output, N, T, use_short_kernel, cache_out = token_shift_fwd(x, cu_seqlens, cache, output_cache, out)
         ctx.cu_seqlens = cu_seqlens
         ctx.N = N
         ctx.T = T
@@ -502,14 +504,15 @@ class TokenShift(torch.autograd.Function):
     def backward(ctx, dy: torch.Tensor, dcache: Optional[torch.Tensor] = None):
         dx, grad_cache = token_shift_bwd(dy, ctx.N, ctx.T, dcache, ctx.cu_seqlens,
                                          ctx.use_short_kernel, ctx.has_cache)
-        return dx, None, grad_cache, None
+        return dx, None, grad_cache, None, None
 
 
 def token_shift(
     x: torch.Tensor,
     cu_seqlens: Optional[torch.LongTensor] = None,
     cache: Optional[torch.Tensor] = None,
-    output_cache: bool = False
+    output_cache: bool = False,
+    out: Optional[torch.Tensor] = None
 ):
     """
     Token-shift operation implemented with Triton kernels.
@@ -524,6 +527,8 @@ def token_shift(
                       In previous versions this parameter did not exist and the
                       cache was always dropped; to preserve backward compatibility
                       the default is False.
+        out: Optional preallocated buffer of shape [B, T, D] the output is written into.
+             Meant for inference, where one scratch buffer can be reused across layers.
 
     Returns:
         output: Tensor of shape [B, T, D] after applying the token-shift.
@@ -536,7 +541,7 @@ def token_shift(
         assert x.dim() == 3, "Input must be [B, T, D]"
         assert x.shape[0] == 1, "Batch size must be 1 when using cu_seqlens"
 
-    output, cache_out = TokenShift.apply(x, cu_seqlens, cache, output_cache)
+    output, cache_out = TokenShift.apply(x, cu_seqlens, cache, output_cache, out)
     if output_cache:
         return output, cache_out
     else:
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) 2023-2025, Songlin Yang, Yu Zhang
 
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import torch
@@ -8,15 +9,35 @@ import triton
 import triton.language as tl
 
 from fla.modules.l2norm import l2norm_bwd, l2norm_fwd
-from fla.utils import input_guard
+from fla.utils import get_multiprocessor_count, input_guard
+
+
+@lru_cache(maxsize=256)
+def get_launch_params(K: int, V: int) -> Tuple[int, int, int, int]:
+    # the block sizes only depend on the head dims, so they are derived once per shape
+    # instead of on every call, which matters for T=1 decoding
+    BK, BV = triton.next_power_of_2(K), min(triton.next_power_of_2(V), 32)
+    NK, NV = triton.cdiv(K, BK), triton.cdiv(V, BV)
+    return BK, BV, NK, NV
 
 
 @triton.heuristics({
     'USE_INITIAL_STATE': lambda args: args['h0'] is not None,
     'STORE_FINAL_STATE': lambda args: args['ht'] is not None,
+    'STORE_U': lambda args: args['u'] is not None,
+    'NO_BETA': lambda args: args['beta'] is None,
     'IS_VARLEN': lambda args: args['cu_seqlens'] is not None
 })
-@triton.jit(do_not_specialize=['T'])
+@triton.autotune(
+    configs=[
+        triton.Config({'BV': BV}, num_warps=num_warps, num_stages=num_stages)
+        for BV in [8, 16, 32, 64]
+        for num_warps in [1, 2, 4]
+        for num_stages in [1, 2, 3]
+    ],
+    key=['K', 'V', 'IS_BETA_HEADWISE'],
+)
+@triton.jit(do_not_specialize=['T', 'N'])
 def fused_recurrent_delta_rule_fwd_kernel(
     q,
     k,
@@ -29,81 +50,180 @@ def fused_recurrent_delta_rule_fwd_kernel(
     cu_seqlens,
     scale,
     T,
+    N,
     B: tl.constexpr,
     H: tl.constexpr,
     K: tl.constexpr,
     V: tl.constexpr,
     BK: tl.constexpr,
     BV: tl.constexpr,
+    BT: tl.constexpr,
     USE_INITIAL_STATE: tl.constexpr,
     STORE_FINAL_STATE: tl.constexpr,
+    STORE_U: tl.constexpr,
+    NO_BETA: tl.constexpr,  # whether beta is omitted, i.e., all ones
     IS_BETA_HEADWISE: tl.constexpr,
     IS_VARLEN: tl.constexpr,
 ):
-    i_v, i_k, i_nh = tl.program_id(0), tl.program_id(1), tl.program_id(2)
-    i_n, i_h = i_nh // H, i_nh % H
-    if IS_VARLEN:
-        bos, eos = tl.load(cu_seqlens + i_n).to(tl.int64), tl.load(cu_seqlens + i_n + 1).to(tl.int64)
-        all = T
-        T = eos - bos
-    else:
-        bos, eos = i_n * T, i_n * T + T
-        all = B * T
+    i_v, i_k = tl.program_id(0), tl.program_id(1)
+    # persistent over the (sequence, head) pairs, each program walks several of them in turn
+    for i_nh in range(tl.program_id(2), N * H, tl.num_programs(2)):
+        i_n, i_h = i_nh // H, i_nh % H
+        if IS_VARLEN:
+            bos, eos = tl.load(cu_seqlens + i_n).to(tl.int64), tl.load(cu_seqlens + i_n + 1).to(tl.int64)
+            T_n = eos - bos
+        else:
+            bos, eos = i_n * T, i_n * T + T
+            T_n = T
+
+        p_q = q + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
+        p_k = k + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
+        p_v = v + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+        if STORE_U:
+            p_u = u + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+        if IS_BETA_HEADWISE:
+            p_beta = beta + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+        elif not NO_BETA:
+            p_beta = beta + bos * H + i_h
+        p_o = o + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+
+        mask_k = (i_k * BK + tl.arange(0, BK)) < K
+        mask_v = (i_v * BV + tl.arange(0, BV)) < V
+        mask_h = mask_k[None, :] & mask_v[:, None]
+
+        b_h = tl.zeros([BV, BK], dtype=tl.float32)
+        if USE_INITIAL_STATE:
+            p_h0 = h0 + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[None, :]) * V + (i_v * BV + tl.arange(0, BV)[:, None])
+            b_h += tl.load(p_h0, mask=mask_h, other=0).to(tl.float32)
+
+        # the time loop is unrolled by BT steps so that the loads of later steps,
+        # which do not depend on `b_h`, can be issued ahead of the state update.
+        # steps past the end of the sequence load zeros and leave `b_h` untouched
+        for i_t in range(0, T_n, BT):
+            for i_s in tl.static_range(BT):
+                m_t = i_t + i_s < T_n
+                b_k = tl.load(p_k, mask=mask_k & m_t, other=0).to(tl.float32)
+                b_v = tl.load(p_v, mask=mask_v & m_t, other=0).to(tl.float32)
+                b_q = tl.load(p_q, mask=mask_k & m_t, other=0).to(tl.float32) * scale
+                # NOTE: both state reductions are matrix-vector products, `tl.dot` needs every dim >= 16
+                # and would have to pad the vector to 16 rows, so they are kept as broadcast-and-sum
+                b_v_minus = tl.sum(b_h * b_k[None, :], axis=1)
+                b_v -= b_v_minus
+                if IS_BETA_HEADWISE:
+                    b_beta = tl.load(p_beta, mask=mask_v & m_t, other=0).to(tl.float32)
+                elif not NO_BETA:
+                    b_beta = tl.load(p_beta, mask=m_t, other=0).to(tl.float32)
+                if STORE_U:
+                    tl.store(p_u, b_v.to(p_v.dtype.element_ty), mask=mask_v & m_t)
+                if not NO_BETA:
+                    b_v *= b_beta
+                b_h += b_k[None, :] * b_v[:, None]
+                b_o = b_h * b_q[None, :]
+                b_o = tl.sum(b_o, axis=1)
+                tl.store(p_o, b_o.to(p_o.dtype.element_ty), mask=mask_v & m_t)
+
+                p_q += H*K
+                p_k += H*K
+                p_o += H*V
+                p_v += H*V
+                if STORE_U:
+                    p_u += H*V
+                if not NO_BETA:
+                    p_beta += H * (V if IS_BETA_HEADWISE else 1)
+
+        if STORE_FINAL_STATE:
+            p_ht = ht + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[None, :]) * V + (i_v * BV + tl.arange(0, BV)[:, None])
+            tl.store(p_ht, b_h.to(p_ht.dtype.element_ty), mask=mask_h)
 
-    p_q = q + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
-    p_k = k + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
-    p_v = v + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-    p_u = u + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-    if IS_BETA_HEADWISE:
-        p_beta = beta + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-    else:
-        p_beta = beta + bos * H + i_h
-    p_o = o + ((i_k * all + bos) * H + i_h) * V + i_v * BV + tl.arange(0, BV)
 
-    mask_k = (i_k * BK + tl.arange(0, BK)) < K
-    mask_v = (i_v * BV + tl.arange(0, BV)) < V
+@triton.heuristics({
+    'USE_INITIAL_STATE': lambda args: args['h0'] is not None,
+    'STORE_FINAL_STATE': lambda args: args['ht'] is not None,
+    'NO_BETA': lambda args: args['beta'] is None,
+})
+@triton.autotune(
+    configs=[
+        triton.Config({'BV': BV}, num_warps=num_warps)
+        for BV in [8, 16, 32, 64]
+        for num_warps in [1, 2, 4, 8]
+    ],
+    key=['K', 'V', 'IS_BETA_HEADWISE'],
+)
+@triton.jit
+def fused_recurrent_delta_rule_decode_kernel(
+    q,
+    k,
+    v,
+    beta,
+    o,
+    h0,
+    ht,
+    scale,
+    H: tl.constexpr,
+    K: tl.constexpr,
+    V: tl.constexpr,
+    BK: tl.constexpr,
+    BV: tl.constexpr,
+    USE_INITIAL_STATE: tl.constexpr,
+    STORE_FINAL_STATE: tl.constexpr,
+    NO_BETA: tl.constexpr,
+    IS_BETA_HEADWISE: tl.constexpr,
+):
+    # a single time step per (sequence, head), so there is no time loop and no pointer bumps
+    i_v, i_nh = tl.program_id(0), tl.program_id(1)
+
+    o_k = tl.arange(0, BK)
+    o_v = i_v * BV + tl.arange(0, BV)
+    mask_k = o_k < K
+    mask_v = o_v < V
     mask_h = mask_k[None, :] & mask_v[:, None]
 
+    b_q = tl.load(q + i_nh * K + o_k, mask=mask_k, other=0).to(tl.float32) * scale
+    b_k = tl.load(k + i_nh * K + o_k, mask=mask_k, other=0).to(tl.float32)
+    b_v = tl.load(v + i_nh * V + o_v, mask=mask_v, other=0).to(tl.float32)
+
     b_h = tl.zeros([BV, BK], dtype=tl.float32)
     if USE_INITIAL_STATE:
-        p_h0 = h0 + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[None, :]) * V + (i_v * BV + tl.arange(0, BV)[:, None])
+        p_h0 = h0 + i_nh * K * V + o_k[None, :] * V + o_v[:, None]
         b_h += tl.load(p_h0, mask=mask_h, other=0).to(tl.float32)
 
-    for _ in range(0, T):
-        b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
-        b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
-        b_q = tl.load(p_q, mask=mask_k, other=0).to(tl.float32) * scale
-        b_v_minus = tl.sum(b_h * b_k[None, :], axis=1)
-        b_v -= b_v_minus
-        if IS_BETA_HEADWISE:
-            b_beta = tl.load(p_beta, mask=mask_v, other=0).to(tl.float32)
-        else:
-            b_beta = tl.load(p_beta).to(tl.float32)
-        tl.store(p_u, b_v.to(p_v.dtype.element_ty), mask=mask_v)
-        b_v *= b_beta
-        b_h += b_k[None, :] * b_v[:, None]
-        b_o = b_h * b_q[None, :]
-        b_o = tl.sum(b_o, axis=1)
-        tl.store(p_o, b_o.to(p_o.dtype.element_ty), mask=mask_v)
-
-        p_q += H*K
-        p_k += H*K
-        p_o += H*V
-        p_v += H*V
-        p_u += H*V
-        p_beta += H * (V if IS_BETA_HEADWISE else 1)
+    b_v -= tl.sum(b_h * b_k[None, :], axis=1)
+    if IS_BETA_HEADWISE:
+        b_v *= tl.load(beta + i_nh * V + o_v, mask=mask_v, other=0).to(tl.float32)
+    elif not NO_BETA:
+        b_v *= tl.load(beta + i_nh).to(tl.float32)
+    b_h += b_k[None, :] * b_v[:, None]
+    b_o = tl.sum(b_h * b_q[None, :], axis=1)
+    tl.store(o + i_nh * V + o_v, b_o.to(o.dtype.element_ty), mask=mask_v)
 
     if STORE_FINAL_STATE:
-        p_ht = ht + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[None, :]) * V + (i_v * BV + tl.arange(0, BV)[:, None])
+        p_ht = ht + i_nh * K * V + o_k[None, :] * V + o_v[:, None]
         tl.store(p_ht, b_h.to(p_ht.dtype.element_ty), mask=mask_h)
 
 
+def zero_dq_dk_db(nargs):
+    # with more than one V block `dq`, `dk` and a scalar `db` are accumulated atomically,
+    # so they have to be cleared before every (benchmarking) run
+    for name in ('dq', 'dk', 'db'):
+        if nargs[name] is not None:
+            nargs[name].zero_()
+
+
 @triton.heuristics({
     'USE_INITIAL_STATE': lambda args: args['h0'] is not None,
     'USE_FINAL_STATE_GRADIENT': lambda args: args['dht'] is not None,
+    'NO_BETA': lambda args: args['beta'] is None,
     'IS_VARLEN': lambda args: args['cu_seqlens'] is not None
 })
-@triton.jit(do_not_specialize=['T'])
+@triton.autotune(
+    configs=[
+        triton.Config({}, num_warps=num_warps, num_stages=num_stages, pre_hook=zero_dq_dk_db)
+        for num_warps in [1, 2, 4, 8]
+        for num_stages in [1, 2, 3]
+    ],
+    key=['K', 'V', 'BV', 'IS_BETA_HEADWISE'],
+)
+@triton.jit(do_not_specialize=['T', 'N'])
 def fused_recurrent_delta_rule_bwd_kernel(
     q,
     k,
@@ -121,162 +241,189 @@ def fused_recurrent_delta_rule_bwd_kernel(
     scale,
     B: tl.constexpr,
     T,
+    N,
     H: tl.constexpr,
     K: tl.constexpr,
     V: tl.constexpr,
     BK: tl.constexpr,
     BV: tl.constexpr,
     NK: tl.constexpr,
+    NO_BETA: tl.constexpr,  # whether beta is omitted, i.e., all ones
     IS_BETA_HEADWISE: tl.constexpr,  # whether beta is headwise vector or scalar
+    USE_ATOMIC: tl.constexpr,  # whether the V blocks accumulate into dq/dk/db atomically
     USE_INITIAL_STATE: tl.constexpr,  # whether to use dh0
     USE_FINAL_STATE_GRADIENT: tl.constexpr,  # whether to use dht
     IS_VARLEN: tl.constexpr,
 ):
-    i_v, i_k, i_nh = tl.program_id(0), tl.program_id(1), tl.program_id(2)
-    i_n, i_h = i_nh // H, i_nh % H
-    if IS_VARLEN:
-        bos, eos = tl.load(cu_seqlens + i_n).to(tl.int64), tl.load(cu_seqlens + i_n + 1).to(tl.int64)
-        all = T
-        T = eos - bos
-    else:
-        bos, eos = i_n * T, i_n * T + T
-        all = B * T
-
-    mask_k = i_k * BK + tl.arange(0, BK) < K
-    mask_v = i_v * BV + tl.arange(0, BV) < V
-
-    p_q = q + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK) + (T - 1) * H*K
-    p_k = k + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK) + (T - 1) * H*K
-    p_v = v + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV) + (T - 1) * H*V
-    p_do = do + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV) + (T - 1) * H*V
-    p_dk = dk + ((i_v * all + bos) * H + i_h) * K + i_k * BK + tl.arange(0, BK) + (T - 1) * H*K
-    p_dv = dv + ((i_k * all + bos) * H + i_h) * V + i_v * BV + tl.arange(0, BV) + (T - 1) * H*V
-    if IS_BETA_HEADWISE:
-        p_beta = beta + (bos + T - 1) * H*V + i_h * V + i_v * BV + tl.arange(0, BV)
-        p_dbeta = db + ((i_v * NK + i_k) * all + bos + T - 1) * H*V + i_h * V + tl.arange(0, BV)
-    else:
-        p_beta = beta + (bos + T - 1) * H + i_h
-        p_dbeta = db + (i_v * all + bos + T - 1) * H + i_h
-
-    b_dh = tl.zeros([BK, BV], dtype=tl.float32)
-    if USE_FINAL_STATE_GRADIENT:
-        p_ht = dht + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[:, None]) * V + (i_v * BV + tl.arange(0, BV)[None, :])
-        b_dh += tl.load(p_ht, mask=mask_k[:, None] & mask_v[None, :], other=0).to(tl.float32)
-
-    for _ in range(T):
-        b_q = tl.load(p_q, mask=mask_k, other=0).to(tl.float32) * scale
-        b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
-        b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
-        b_do = tl.load(p_do, mask=mask_v, other=0).to(tl.float32)
-        if IS_BETA_HEADWISE:
-            b_beta = tl.load(p_beta, mask=mask_v, other=0).to(tl.float32)
+    i_v, i_k = tl.program_id(0), tl.program_id(1)
+    # persistent over the (sequence, head) pairs, each program walks several of them in turn
+    for i_nh in range(tl.program_id(2), N * H, tl.num_programs(2)):
+        i_n, i_h = i_nh // H, i_nh % H
+        if IS_VARLEN:
+            bos, eos = tl.load(cu_seqlens + i_n).to(tl.int64), tl.load(cu_seqlens + i_n + 1).to(tl.int64)
+            T_n = eos - bos
         else:
-            b_beta = tl.load(p_beta).to(tl.float32)
-        b_dh += b_q[:, None] * b_do[None, :]
-        b_dk = tl.sum(b_dh * (b_v * b_beta)[None, :], axis=1)
-        b_dv = tl.sum(b_dh * b_k[:, None], axis=0)
-
-        b_db = b_dv * b_v if IS_BETA_HEADWISE else tl.sum(b_dv * b_v)
-        b_dv = b_dv * b_beta
-
-        tl.store(p_dk, b_dk.to(p_dk.dtype.element_ty), mask=mask_k)
-        tl.store(p_dv, b_dv.to(p_dv.dtype.element_ty), mask=mask_v)
+            bos, eos = i_n * T, i_n * T + T
+            T_n = T
+
+        mask_k = i_k * BK + tl.arange(0, BK) < K
+        mask_v = i_v * BV + tl.arange(0, BV) < V
+
+        p_q = q + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK) + (T_n - 1) * H*K
+        p_k = k + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK) + (T_n - 1) * H*K
+        p_v = v + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV) + (T_n - 1) * H*V
+        p_do = do + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV) + (T_n - 1) * H*V
+        p_dk = dk + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK) + (T_n - 1) * H*K
+        p_dv = dv + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV) + (T_n - 1) * H*V
         if IS_BETA_HEADWISE:
-            tl.store(p_dbeta, b_db.to(p_dbeta.dtype.element_ty), mask=mask_v)
-        else:
-            tl.store(p_dbeta, b_db.to(p_dbeta.dtype.element_ty))
-
-        b_dh -= b_k[:, None] * b_dv[None, :]
-
-        p_q -= H*K
-        p_k -= H*K
-        p_v -= H*V
-        p_do -= H*V
-        p_dk -= H*K
-        p_dv -= H*V
-        p_dbeta -= H * (V if IS_BETA_HEADWISE else 1)
-        p_beta -= H * (V if IS_BETA_HEADWISE else 1)
-
-    if USE_INITIAL_STATE:
-        p_dh0 = dh0 + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[:, None]) * V + (i_v * BV + tl.arange(0, BV)[None, :])
-        tl.store(p_dh0, b_dh.to(p_dh0.dtype.element_ty), mask=mask_k[:, None] & mask_v[None, :])
-
-    tl.debug_barrier()
-
-    b_h = tl.zeros([BK, BV], dtype=tl.float32)
-
-    p_q = q + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
-    p_k = k + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
-    p_v = v + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-    if IS_BETA_HEADWISE:
-        p_beta = beta + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-    else:
-        p_beta = beta + bos * H + i_h
-    p_do = do + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-    p_dq = dq + ((i_v * all + bos) * H + i_h) * K + i_k * BK + tl.arange(0, BK)
-    p_dk = dk + ((i_v * all + bos) * H + i_h) * K + i_k * BK + tl.arange(0, BK)
-    p_dv = dv + ((i_k * all + bos) * H + i_h) * V + i_v * BV + tl.arange(0, BV)
-
-    if USE_INITIAL_STATE:
-        mask_h = mask_k[:, None] & mask_v[None, :]
-        p_h0 = h0 + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[:, None]) * V + (i_v * BV + tl.arange(0, BV)[None, :])
-        b_h += tl.load(p_h0, mask=mask_h, other=0).to(tl.float32)
-
-    for _ in range(0, T):
-        b_dk = tl.load(p_dk, mask=mask_k, other=0).to(tl.float32)
-        b_dv = tl.load(p_dv, mask=mask_v, other=0).to(tl.float32)
-        b_dk -= tl.sum(b_dv[None, :] * b_h, axis=1)
-        tl.store(p_dk, b_dk.to(p_dk.dtype.element_ty), mask=mask_k)
-
-        b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
-        b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
-        b_do = tl.load(p_do, mask=mask_v, other=0).to(tl.float32)
+            p_beta = beta + (bos + T_n - 1) * H*V + i_h * V + i_v * BV + tl.arange(0, BV)
+            p_dbeta = db + (bos + T_n - 1) * H*V + i_h * V + i_v * BV + tl.arange(0, BV)
+        elif not NO_BETA:
+            p_beta = beta + (bos + T_n - 1) * H + i_h
+            p_dbeta = db + (bos + T_n - 1) * H + i_h
+
+        b_dh = tl.zeros([BK, BV], dtype=tl.float32)
+        if USE_FINAL_STATE_GRADIENT:
+            p_ht = dht + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[:, None]) * V + (i_v * BV + tl.arange(0, BV)[None, :])
+            b_dh += tl.load(p_ht, mask=mask_k[:, None] & mask_v[None, :], other=0).to(tl.float32)
+
+        for _ in range(T_n):
+            b_q = tl.load(p_q, mask=mask_k, other=0).to(tl.float32) * scale
+            b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
+            b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
+            b_do = tl.load(p_do, mask=mask_v, other=0).to(tl.float32)
+            b_dh += b_q[:, None] * b_do[None, :]
+            if NO_BETA:
+                b_dk = tl.sum(b_dh * b_v[None, :], axis=1)
+                b_dv = tl.sum(b_dh * b_k[:, None], axis=0)
+            else:
+                if IS_BETA_HEADWISE:
+                    b_beta = tl.load(p_beta, mask=mask_v, other=0).to(tl.float32)
+                else:
+                    b_beta = tl.load(p_beta).to(tl.float32)
+                b_dk = tl.sum(b_dh * (b_v * b_beta)[None, :], axis=1)
+                b_dv = tl.sum(b_dh * b_k[:, None], axis=0)
+
+                b_db = b_dv * b_v if IS_BETA_HEADWISE else tl.sum(b_dv * b_v)
+                b_dv = b_dv * b_beta
+
+            # each program owns its V slice of dv and of a headwise dbeta,
+            # while dk and a scalar dbeta are reduced over all V slices
+            if USE_ATOMIC:
+                tl.atomic_add(p_dk, b_dk, mask=mask_k, sem='relaxed')
+            else:
+                tl.store(p_dk, b_dk.to(p_dk.dtype.element_ty), mask=mask_k)
+            tl.store(p_dv, b_dv.to(p_dv.dtype.element_ty), mask=mask_v)
+            if IS_BETA_HEADWISE:
+                tl.store(p_dbeta, b_db.to(p_dbeta.dtype.element_ty), mask=mask_v)
+            elif not NO_BETA:
+                if USE_ATOMIC:
+                    tl.atomic_add(p_dbeta, b_db, sem='relaxed')
+                else:
+                    tl.store(p_dbeta, b_db.to(p_dbeta.dtype.element_ty))
+
+            b_dh -= b_k[:, None] * b_dv[None, :]
+
+            p_q -= H*K
+            p_k -= H*K
+            p_v -= H*V
+            p_do -= H*V
+            p_dk -= H*K
+            p_dv -= H*V
+            if not NO_BETA:
+                p_dbeta -= H * (V if IS_BETA_HEADWISE else 1)
+                p_beta -= H * (V if IS_BETA_HEADWISE else 1)
+
+        if USE_INITIAL_STATE:
+            p_dh0 = dh0 + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[:, None]) * V + (i_v * BV + tl.arange(0, BV)[None, :])
+            tl.store(p_dh0, b_dh.to(p_dh0.dtype.element_ty), mask=mask_k[:, None] & mask_v[None, :])
+
+        tl.debug_barrier()
+
+        # NOTE: the forward sweep below can not be fused into the reverse sweep above:
+        # `dk` needs the reverse-time `dh` and the forward-time `h` at the same step,
+        # and buffering either of them on-chip would take O(T) memory per program.
+        # It does not need `q`, so only k, v, beta, do and the partial dk/dv are re-read.
+        b_h = tl.zeros([BK, BV], dtype=tl.float32)
+
+        p_k = k + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
+        p_v = v + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
         if IS_BETA_HEADWISE:
-            b_beta = tl.load(p_beta, mask=mask_v, other=0).to(tl.float32)
-        else:
-            b_beta = tl.load(p_beta).to(tl.float32)
-        b_v *= b_beta
-
-        b_h += b_k[:, None] * b_v[None, :]
-        b_dq = b_h * b_do[None, :]
-        d_q = tl.sum(b_dq, axis=1) * scale
-        tl.store(p_dq, d_q.to(p_dq.dtype.element_ty), mask=mask_k)
-
-        p_k += H*K
-        p_v += H*V
-        p_do += H*V
-        p_dq += H*K
-        p_dk += H*K
-        p_dv += H*V
-        p_beta += H * (V if IS_BETA_HEADWISE else 1)
+            p_beta = beta + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+        elif not NO_BETA:
+            p_beta = beta + bos * H + i_h
+        p_do = do + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+        p_dq = dq + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
+        p_dk = dk + (bos * H + i_h) * K + i_k * BK + tl.arange(0, BK)
+        p_dv = dv + (bos * H + i_h) * V + i_v * BV + tl.arange(0, BV)
+
+        if USE_INITIAL_STATE:
+            mask_h = mask_k[:, None] & mask_v[None, :]
+            p_h0 = h0 + i_nh * K * V + (i_k * BK + tl.arange(0, BK)[:, None]) * V + (i_v * BV + tl.arange(0, BV)[None, :])
+            b_h += tl.load(p_h0, mask=mask_h, other=0).to(tl.float32)
+
+        for _ in range(0, T_n):
+            b_dv = tl.load(p_dv, mask=mask_v, other=0).to(tl.float32)
+            if USE_ATOMIC:
+                tl.atomic_add(p_dk, -tl.sum(b_dv[None, :] * b_h, axis=1), mask=mask_k, sem='relaxed')
+            else:
+                b_dk = tl.load(p_dk, mask=mask_k, other=0).to(tl.float32)
+                b_dk -= tl.sum(b_dv[None, :] * b_h, axis=1)
+                tl.store(p_dk, b_dk.to(p_dk.dtype.element_ty), mask=mask_k)
+
+            b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
+            b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
+            b_do = tl.load(p_do, mask=mask_v, other=0).to(tl.float32)
+            if IS_BETA_HEADWISE:
+                b_v *= tl.load(p_beta, mask=mask_v, other=0).to(tl.float32)
+            elif not NO_BETA:
+                b_v *= tl.load(p_beta).to(tl.float32)
+
+            b_h += b_k[:, None] * b_v[None, :]
+            b_dq = b_h * b_do[None, :]
+            d_q = tl.sum(b_dq, axis=1) * scale
+            if USE_ATOMIC:
+                tl.atomic_add(p_dq, d_q, mask=mask_k, sem='relaxed')
+            else:
+                tl.store(p_dq, d_q.to(p_dq.dtype.element_ty), mask=mask_k)
+
+            p_k += H*K
+            p_v += H*V
+            p_do += H*V
+            p_dq += H*K
+            p_dk += H*K
+            p_dv += H*V
+            if not NO_BETA:
+                p_beta += H * (V if IS_BETA_HEADWISE else 1)
 
 
 def fused_recurrent_delta_rule_fwd(
     q: torch.Tensor,
     k: torch.Tensor,
     v: torch.Tensor,
-    beta: torch.Tensor,
+    beta: Optional[torch.Tensor],
     scale: float,
     initial_state: torch.Tensor,
     output_final_state: bool,
     cu_seqlens: Optional[torch.LongTensor] = None,
-) -> Tuple[torch.Tensor, torch.Tensor]:
+    output_u: bool = True,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
     B, T, H, K, V = *k.shape, v.shape[-1]
     N = B if cu_seqlens is None else len(cu_seqlens) - 1
-    BK, BV = triton.next_power_of_2(K), min(triton.next_power_of_2(V), 8)
-    NK, NV = triton.cdiv(K, BK), triton.cdiv(V, BV)
+    BK, _, NK, _ = get_launch_params(K, V)
     assert NK == 1, "NK > 1 is not supported yet"
-    num_stages = 1
-    num_warps = 1
 
-    o = q.new_empty(NK, *v.shape)
+    o = q.new_empty(v.shape)
     if output_final_state:
         final_state = q.new_empty(N, H, K, V, dtype=torch.float32)
     else:
         final_state = None
 
-    grid = (NV, NK, N * H)
-    u = torch.empty_like(v)
+    # at most one program per SM along the (sequence, head) axis, each looping over several pairs
+    NP = min(N * H, get_multiprocessor_count(q.device.index))
+    def grid(meta): return (triton.cdiv(V, meta['BV']), NK, NP)
+    # `u` (the delta-corrected values) is only consumed by the backward pass
+    u = torch.empty_like(v) if output_u else None
     fused_recurrent_delta_rule_fwd_kernel[grid](
         q,
         k,
@@ -289,25 +436,65 @@ def fused_recurrent_delta_rule_fwd(
         cu_seqlens,
         scale,
         T=T,
+        N=N,
         B=B,
         H=H,
         K=K,
         V=V,
         BK=BK,
-        BV=BV,
-        IS_BETA_HEADWISE=beta.ndim == v.ndim,
-        num_warps=num_warps,
-        num_stages=num_stages,
+        BT=4,
+        IS_BETA_HEADWISE=beta is not None and beta.ndim == v.ndim,
     )
-    o = o.squeeze(0)
     return o, u, final_state
 
 
+@input_guard
+def fused_recurrent_delta_rule_decode(
+    q: torch.Tensor,
+    k: torch.Tensor,
+    v: torch.Tensor,
+    beta: Optional[torch.Tensor],
+    scale: float,
+    initial_state: Optional[torch.Tensor],
+    output_final_state: bool,
+    use_qk_l2norm_in_kernel: bool = False,
+) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    B, T, H, K, V = *k.shape, v.shape[-1]
+    assert T == 1, "the decoding kernel only handles a single time step"
+    BK, _, NK, _ = get_launch_params(K, V)
+    assert NK == 1, "NK > 1 is not supported yet"
+
+    if use_qk_l2norm_in_kernel:
+        q, _ = l2norm_fwd(q)
+        k, _ = l2norm_fwd(k)
+
+    o = q.new_empty(v.shape)
+    final_state = q.new_empty(B, H, K, V, dtype=torch.float32) if output_final_state else None
+
+    def grid(meta): return (triton.cdiv(V, meta['BV']), B * H)
+    fused_recurrent_delta_rule_decode_kernel[grid](
+        q,
+        k,
+        v,
+        beta,
+        o,
+        initial_state,
+        final_state,
+        scale,
+        H=H,
+        K=K,
+        V=V,
+        BK=BK,
+        IS_BETA_HEADWISE=beta is not None and beta.ndim == v.ndim,
+    )
+    return o, final_state
+
+
 def fused_recurrent_delta_rule_bwd(
     q: torch.Tensor,
     k: torch.Tensor,
     v: torch.Tensor,
-    beta: torch.Tensor,
+    beta: Optional[torch.Tensor],
     dht: torch.Tensor,
     do: torch.Tensor,
     scale: float,
@@ -316,22 +503,28 @@ def fused_recurrent_delta_rule_bwd(
 ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
     B, T, H, K, V = *k.shape, v.shape[-1]
     N = B if cu_seqlens is None else len(cu_seqlens) - 1
-    BK, BV = triton.next_power_of_2(K), min(triton.next_power_of_2(V), 32)
-    NK, NV = triton.cdiv(K, BK), triton.cdiv(V, BV)
+    BK, BV, NK, NV = get_launch_params(K, V)
     assert NK == 1, "NK > 1 is not supported yet"
-    num_stages = 1
-    num_warps = 2
 
-    beta_vector = beta.ndim == v.ndim
+    beta_vector = beta is not None and beta.ndim == v.ndim
+    # with more than one V block, dq/dk (and a scalar dbeta) are accumulated atomically in fp32
+    use_atomic = NV > 1
 
-    dq = q.new_empty(NV, *q.shape)
-    dk = q.new_empty(NV, *k.shape)
-    dv = q.new_empty(NK, *v.shape)
-    if beta_vector:
-        db = q.new_empty(NV, NK, B, T, H, V)
+    # the atomically accumulated buffers are zeroed by the `zero_dq_dk_db` pre-hook right before each launch
+    if use_atomic:
+        dq = q.new_empty(q.shape, dtype=torch.float32)
+        dk = q.new_empty(k.shape, dtype=torch.float32)
+    else:
+        dq = torch.empty_like(q)
+        dk = torch.empty_like(k)
+    dv = torch.empty_like(v)
+    if beta is None:
+        db = None
+    elif beta_vector:
+        db = q.new_empty(B, T, H, V)
     else:
-        db = q.new_empty(NV, B, T, H)
-    grid = (NV, NK, N * H)
+        db = q.new_empty(B, T, H, dtype=torch.float32 if use_atomic else q.dtype)
+    grid = (NV, NK, min(N * H, get_multiprocessor_count(q.device.index)))
 
     if initial_state is not None and initial_state.requires_grad:
         dh0 = torch.empty_like(initial_state, dtype=torch.float32)
@@ -354,6 +547,7 @@ def fused_recurrent_delta_rule_bwd(
         cu_seqlens,
         scale,
         T=T,
+        N=N,
         B=B,
         H=H,
         K=K,
@@ -362,13 +556,11 @@ def fused_recurrent_delta_rule_bwd(
         BV=BV,
         NK=NK,
         IS_BETA_HEADWISE=beta_vector,
-        num_warps=num_warps,
-        num_stages=num_stages
+        USE_ATOMIC=use_atomic,
     )
-    dq = dq.sum(0)
-    dk = dk.sum(0)
-    dv = dv.sum(0)
-    db = db.sum((0, 1)) if beta_vector else db.sum(0)
+    if use_atomic:
+        dq, dk = dq.to(q.dtype), dk.to(k.dtype)
+        db = db.to(q.dtype) if db is not None else None
 
     return dq, dk, dv, db, dh0
 
@@ -404,6 +596,7 @@ class FusedRecurrentFunction(torch.autograd.Function):
             initial_state=initial_state,
             output_final_state=output_final_state,
             cu_seqlens=cu_seqlens,
+            output_u=any(ctx.needs_input_grad),
         )
 
         ctx.save_for_backward(q, q_rstd, k, k_rstd, u, beta, initial_state)
@@ -430,7 +623,8 @@ class FusedRecurrentFunction(torch.autograd.Function):
         if ctx.use_qk_l2norm_in_kernel:
             dq = l2norm_bwd(q, q_rstd, dq)
             dk = l2norm_bwd(k, k_rstd, dk)
-        return dq.to(q), dk.to(k), dv.to(v), db.to(beta), None, dh0, None, None, None
+        db = db.to(beta) if beta is not None else None
+        return dq.to(q), dk.to(k), dv.to(v), db, None, dh0, None, None, None
 
 
 @torch.compiler.disable
@@ -453,8 +647,8 @@ def fused_recurrent_delta_rule(
             keys of shape `[B, T, H, K]`.
         v (torch.Tensor):
             values of shape `[B, T, H, V]`.
-        beta (torch.Tensor):
-            betas of shape `[B, T, H]`.
+        beta (Optional[torch.Tensor]):
+            betas of shape `[B, T, H]`. If not provided, betas are treated as all ones. Default: `None`.
         scale (Optional[float]):
             Scale factor for the RetNet attention scores.
             If not provided, it will default to `1 / sqrt(K)`. Default: `None`.
@@ -519,8 +713,20 @@ def fused_recurrent_delta_rule(
         scale = k.shape[-1] ** -0.5
     else:
         assert scale > 0, "scale must be positive"
-    if beta is None:
-        beta = torch.ones_like(q[..., 0])
+    # single-step decoding without gradients skips the autograd function and the time loop altogether
+    if cu_seqlens is None and q.shape[1] == 1 and not (
+        torch.is_grad_enabled() and any(t is not None and t.requires_grad for t in (q, k, v, beta, initial_state))
+    ):
+        return fused_recurrent_delta_rule_decode(
+            q=q,
+            k=k,
+            v=v,
+            beta=beta,
+            scale=scale,
+            initial_state=initial_state,
+            output_final_state=output_final_state,
+            use_qk_l2norm_in_kernel=use_qk_l2norm_in_kernel,
+        )
     o, final_state = FusedRecurrentFunction.apply(
         q,
         k,
@@ -43,6 +43,7 @@ def chunk_rwkv6_fwd_cumsum_kernel(
     S: tl.constexpr,
     BT: tl.constexpr,
     BS: tl.constexpr,
+    NEG_EXP_W: tl.constexpr,
     IS_VARLEN: tl.constexpr,
 ):
     i_s, i_t, i_bh = tl.program_id(0), tl.program_id(1), tl.program_id(2)
@@ -63,6 +64,9 @@ def chunk_rwkv6_fwd_cumsum_kernel(
     p_oe = tl.make_block_ptr(oe + (bos * H + i_h) * S, (T, S), (H*S, 1), (i_t * BT, i_s * BS), (BT, BS), (1, 0))
     # [BT, BS]
     b_s = tl.load(p_s, boundary_check=(0, 1)).to(tl.float32)
+    if NEG_EXP_W:
+        # the padded rows/cols are never stored, so it is safe not to mask them here
+        b_s = -exp(b_s)
     b_oi = tl.dot(m_i, b_s)
     b_oe = tl.dot(m_e, b_s)
     tl.store(p_oi, b_oi.to(p_oi.dtype.element_ty, fp_downcast_rounding="rtne"), boundary_check=(0, 1))
@@ -73,6 +77,7 @@ def chunk_rwkv6_fwd_cumsum(
     g: torch.Tensor,
     chunk_size: int,
     cu_seqlens: Optional[torch.Tensor] = None,
+    use_neg_exp_w_in_kernel: bool = False,
 ) -> torch.Tensor:
     B, T, H, S = g.shape
     BT = chunk_size
@@ -92,6 +97,7 @@ def chunk_rwkv6_fwd_cumsum(
         H=H,
         S=S,
         BT=BT,
+        NEG_EXP_W=use_neg_exp_w_in_kernel,
     )
     return gi, ge
 
@@ -616,6 +622,7 @@ def chunk_rwkv6_bwd_kernel_inter(
     k,
     v,
     h,
+    g,
     gi,
     ge,
     u,
@@ -638,6 +645,7 @@ def chunk_rwkv6_bwd_kernel_inter(
     BT: tl.constexpr,
     BK: tl.constexpr,
     BV: tl.constexpr,
+    NEG_EXP_W: tl.constexpr,
     IS_VARLEN: tl.constexpr,
 ):
     i_k, i_t, i_bh = tl.program_id(0), tl.program_id(1), tl.program_id(2)
@@ -716,6 +724,11 @@ def chunk_rwkv6_bwd_kernel_inter(
     p_dq = tl.make_block_ptr(dq2 + (bos * H + i_h) * K, (T, K), (H*K, 1), (i_t * BT, i_k * BK), (BT, BK), (1, 0))
     p_dk = tl.make_block_ptr(dk2 + (bos * H + i_h) * K, (T, K), (H*K, 1), (i_t * BT, i_k * BK), (BT, BK), (1, 0))
     p_dg = tl.make_block_ptr(dg + (bos * H + i_h) * K, (T, K), (H*K, 1), (i_t * BT, i_k * BK), (BT, BK), (1, 0))
+    if NEG_EXP_W:
+        # chain rule through the log decay -exp(w)
+        p_g = tl.make_block_ptr(g + (bos * H + i_h) * K, (T, K), (H*K, 1), (i_t * BT, i_k * BK), (BT, BK), (1, 0))
+        b_g = tl.load(p_g, boundary_check=(0, 1)).to(tl.float32)
+        b_dg = b_dg * -exp(b_g)
     tl.store(p_dq, b_dq.to(p_dq.dtype.element_ty), boundary_check=(0, 1))
     tl.store(p_dk, b_dk.to(p_dk.dtype.element_ty), boundary_check=(0, 1))
     tl.store(p_dg, b_dg.to(p_dg.dtype.element_ty), boundary_check=(0, 1))
@@ -934,7 +947,8 @@ def chunk_rwkv6_bwd_dqkgu(
     dk: torch.Tensor,
     scale: float,
     cu_seqlens: Optional[torch.LongTensor] = None,
-    chunk_size: int = 64
+    chunk_size: int = 64,
+    use_neg_exp_w_in_kernel: bool = False,
 ):
     B, T, H, K, V = *k.shape, v.shape[-1]
     BT = min(chunk_size, max(16, triton.next_power_of_2(T)))
@@ -952,6 +966,7 @@ def chunk_rwkv6_bwd_dqkgu(
         k,
         v,
         h,
+        g,
         gi,
         ge,
         u,
@@ -972,6 +987,7 @@ def chunk_rwkv6_bwd_dqkgu(
         K=K,
         V=V,
         BT=BT,
+        NEG_EXP_W=use_neg_exp_w_in_kernel,
     )
     du = du.sum(0)
     return dq2, dk2, dg, du
@@ -987,9 +1003,15 @@ def chunk_rwkv6_fwd(
     initial_state: torch.Tensor,
     output_final_state: bool,
     cu_seqlens: Optional[torch.LongTensor] = None,
-    chunk_size: int = 64
+    chunk_size: int = 64,
+    use_neg_exp_w_in_kernel: bool = False,
 ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
-    gi, ge = chunk_rwkv6_fwd_cumsum(g, chunk_size=chunk_size, cu_seqlens=cu_seqlens)
+    gi, ge = chunk_rwkv6_fwd_cumsum(
+        g,
+        chunk_size=chunk_size,
+        cu_seqlens=cu_seqlens,
+        use_neg_exp_w_in_kernel=use_neg_exp_w_in_kernel
+    )
     h, ht = chunk_fwd_h(
         k=k,
         v=v,
@@ -1040,9 +1062,15 @@ def chunk_rwkv6_bwd(
     do: torch.Tensor,
     dht: torch.Tensor,
     cu_seqlens: Optional[torch.LongTensor] = None,
-    chunk_size: int = 64
+    chunk_size: int = 64,
+    use_neg_exp_w_in_kernel: bool = False,
 ):
-    gi, ge = chunk_rwkv6_fwd_cumsum(g, chunk_size=chunk_size, cu_seqlens=cu_seqlens)
+    gi, ge = chunk_rwkv6_fwd_cumsum(
+        g,
+        chunk_size=chunk_size,
+        cu_seqlens=cu_seqlens,
+        use_neg_exp_w_in_kernel=use_neg_exp_w_in_kernel
+    )
     h, _ = chunk_fwd_h(
         k=k,
         v=v,
@@ -1112,7 +1140,8 @@ def chunk_rwkv6_bwd(
         dk=dk,
         scale=scale,
         cu_seqlens=cu_seqlens,
-        chunk_size=chunk_size
+        chunk_size=chunk_size,
+        use_neg_exp_w_in_kernel=use_neg_exp_w_in_kernel
     )
     return dq, dk, dv, dg, du, dh0
 
@@ -1133,6 +1162,7 @@ class ChunkRWKV6Function(torch.autograd.Function):
         initial_state,
         output_final_state,
         cu_seqlens,
+        use_neg_exp_w_in_kernel,
     ):
         T = q.shape[1]
         if check_shared_mem():
@@ -1150,7 +1180,8 @@ class ChunkRWKV6Function(torch.autograd.Function):
             initial_state=initial_state,
             output_final_state=output_final_state,
             cu_seqlens=cu_seqlens,
-            chunk_size=chunk_size
+            chunk_size=chunk_size,
+            use_neg_exp_w_in_kernel=use_neg_exp_w_in_kernel
         )
 
         ctx.save_for_backward(q, k, v, g, initial_state, A, u)
@@ -1158,6 +1189,7 @@ class ChunkRWKV6Function(torch.autograd.Function):
         ctx.chunk_size = chunk_size
         ctx.scale = scale
         ctx.cu_seqlens = cu_seqlens
+        ctx.use_neg_exp_w_in_kernel = use_neg_exp_w_in_kernel
         return o, ht
 
     @staticmethod
@@ -1178,9 +1210,10 @@ class ChunkRWKV6Function(torch.autograd.Function):
             do=do,
             dht=dht,
             cu_seqlens=cu_seqlens,
-            chunk_size=chunk_size
+            chunk_size=chunk_size,
+            use_neg_exp_w_in_kernel=ctx.use_neg_exp_w_in_kernel
         )
-        return dq.to(q), dk.to(k), dv.to(v), dg.to(g), du.to(u), None, dh0, None, None
+        return dq.to(q), dk.to(k), dv.to(v), dg.to(g), du.to(u), None, dh0, None, None, None
 
 
 @torch.compiler.disable
@@ -1194,6 +1227,7 @@ def chunk_rwkv6(
     initial_state: torch.Tensor = None,
     output_final_state: bool = False,
     cu_seqlens: Optional[torch.LongTensor] = None,
+    use_neg_exp_w_in_kernel: bool = False,
     head_first: bool = False
 ) -> Tuple[torch.Tensor, torch.Tensor]:
     r"""
@@ -1220,6 +1254,9 @@ def chunk_rwkv6(
         cu_seqlens (torch.LongTensor):
             Cumulative sequence lengths of shape `[N+1]` used for variable-length training,
             consistent with the FlashAttention API.
+        use_neg_exp_w_in_kernel (Optional[bool]):
+            If `True`, `w` holds raw decay logits and the log decays `-exp(w)` are computed inside the kernels,
+            which saves a full elementwise pass over `w`. Default: `False`.
         head_first (Optional[bool]):
             Whether the inputs are in the head-first format. Default: `False`.
             This argument has been deprecated.
@@ -1296,5 +1333,6 @@ def chunk_rwkv6(
         initial_state,
         output_final_state,
         cu_seqlens,
+        use_neg_exp_w_in_kernel,
     )
     return o, final_state
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from typing import Optional, Tuple
+
+import torch
+
+from fla.utils import torch_compile
+
+
+def fused_addcmul_rwkv6_ref(
+    hidden_states: torch.Tensor,
+    delta: torch.Tensor,
+    x: torch.Tensor,
+    x_bias: torch.Tensor,
+    mask: Optional[torch.Tensor] = None
+) -> Tuple[torch.Tensor, ...]:
+    """
+    hidden_states: [B, T, D]
+    delta: [B, T, D]
+    x: [5, B, T, D], data-dependent offsets of the r/w/k/v/g mus
+    x_bias: [5, D]
+    mask: [B, T], optional 0-1 padding mask applied to the value input
+    """
+    xr, xw, xk, xv, xg = torch.addcmul(hidden_states, delta, x + x_bias[:, None, None]).unbind(0)
+    if mask is not None:
+        xv = xv * mask[..., None]
+    return xr, xw, xk, xv, xg
+
+
+@torch_compile
+def fused_addcmul_rwkv6(
+    hidden_states: torch.Tensor,
+    delta: torch.Tensor,
+    x: torch.Tensor,
+    x_bias: torch.Tensor,
+    mask: Optional[torch.Tensor] = None
+) -> Tuple[torch.Tensor, ...]:
+    # the bias add and the five lerps are lowered into a single pointwise kernel
+    xr, xw, xk, xv, xg = torch.addcmul(hidden_states, delta, x + x_bias[:, None, None]).unbind(0)
+    if mask is not None:
+        # `v_proj` is bias-free, so masking its input is equivalent to masking `v`
+        # and lets the mask ride along in the same kernel
+        xv = xv * mask[..., None]
+    return xr, xw, xk, xv, xg
+
+
+@torch_compile
+def fused_lerp_rwkv6(
+    hidden_states: torch.Tensor,
+    shifted: torch.Tensor,
+    x: torch.Tensor,
+    x_bias: torch.Tensor,
+    mask: Optional[torch.Tensor] = None
+) -> Tuple[torch.Tensor, ...]:
+    """
+    Same as `fused_addcmul_rwkv6` with `delta = shifted - hidden_states`,
+    where `shifted` of shape `[B, 1, D]` is broadcast over time, e.g., the cached last token during decoding.
+    The subtraction stays in registers, so `delta` is never written to memory.
+    """
+    xr, xw, xk, xv, xg = torch.lerp(hidden_states, shifted, x + x_bias[:, None, None]).unbind(0)
+    if mask is not None:
+        xv = xv * mask[..., None]
+    return xr, xw, xk, xv, xg
@@ -9,7 +9,7 @@ import triton
 import triton.language as tl
 
 from fla.ops.utils.op import exp
-from fla.utils import autocast_custom_bwd, autocast_custom_fwd, input_guard
+from fla.utils import autocast_custom_bwd, autocast_custom_fwd, input_guard, torch_compile
 
 
 @triton.heuristics({
@@ -44,6 +44,7 @@ def fused_recurrent_rwkv6_fwd_kernel(
     BK: tl.constexpr,
     BV: tl.constexpr,
     REVERSE: tl.constexpr,  # whether to reverse the recurrence
+    NEG_EXP_W: tl.constexpr,  # whether to compute the log decay -exp(w) in the kernel
     USE_INITIAL_STATE: tl.constexpr,  # whether to use initial state
     STORE_FINAL_STATE: tl.constexpr,  # whether to store final state
     IS_VARLEN: tl.constexpr,
@@ -83,6 +84,8 @@ def fused_recurrent_rwkv6_fwd_kernel(
         b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
         b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
         b_w = tl.load(p_w, mask=mask_k, other=0).to(tl.float32)
+        if NEG_EXP_W:
+            b_w = -exp(b_w)
         b_kv = b_k[:, None] * b_v[None, :]
         b_o = tl.sum((b_h + b_kv * b_u[:, None]) * b_q[:, None], 0)
         b_h = b_h * exp(b_w)[:, None] + b_kv
@@ -130,6 +133,7 @@ def fused_recurrent_rwkv6_bwd_kernel_dq(
     BK: tl.constexpr,
     BV: tl.constexpr,
     REVERSE: tl.constexpr,
+    NEG_EXP_W: tl.constexpr,
     USE_INITIAL_STATE: tl.constexpr,
     IS_VARLEN: tl.constexpr,
 ):
@@ -168,6 +172,8 @@ def fused_recurrent_rwkv6_bwd_kernel_dq(
         b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
         b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
         b_w = tl.load(p_w, mask=mask_k, other=0).to(tl.float32)
+        if NEG_EXP_W:
+            b_w = -exp(b_w)
         b_do = tl.load(p_do, mask=mask_v, other=0).to(tl.float32)
         b_kv = b_k[:, None] * b_v[None, :]
 
@@ -221,6 +227,7 @@ def fused_recurrent_rwkv6_bwd_kernel_dkv(
     BK: tl.constexpr,
     BV: tl.constexpr,
     REVERSE: tl.constexpr,
+    NEG_EXP_W: tl.constexpr,
     USE_INITIAL_STATE: tl.constexpr,
     IS_VARLEN: tl.constexpr,
 ):
@@ -258,6 +265,8 @@ def fused_recurrent_rwkv6_bwd_kernel_dkv(
         b_k = tl.load(p_k, mask=mask_k, other=0).to(tl.float32)
         b_v = tl.load(p_v, mask=mask_v, other=0).to(tl.float32)
         b_w = tl.load(p_w, mask=mask_k, other=0).to(tl.float32)
+        if NEG_EXP_W:
+            b_w = -exp(b_w)
         b_do = tl.load(p_do, mask=mask_v, other=0).to(tl.float32)
         b_dkv = b_q[:, None] * b_do[None, :]
         b_dk = tl.sum(b_dh * b_v[None, :], 1)
@@ -300,6 +309,7 @@ def fused_recurrent_rwkv6_bwd_kernel_dkv(
 def fused_recurrent_rwkv6_bwd_kernel_dw(
     q,
     k,
+    w,
     dq,
     dk,
     dw,
@@ -311,6 +321,7 @@ def fused_recurrent_rwkv6_bwd_kernel_dw(
     BT: tl.constexpr,
     BK: tl.constexpr,
     REVERSE: tl.constexpr,
+    NEG_EXP_W: tl.constexpr,
     IS_VARLEN: tl.constexpr
 ):
     i_k, i_nh = tl.program_id(0), tl.program_id(1)
@@ -341,6 +352,11 @@ def fused_recurrent_rwkv6_bwd_kernel_dw(
         b_dk = tl.load(p_dk, boundary_check=(0, 1)).to(tl.float32)
         b_dw = (b_q * b_dq * scale) - b_k * b_dk
         b_c = b_z[None, :] + tl.dot(m_i, b_dw, allow_tf32=False)
+        if NEG_EXP_W:
+            # chain rule through the log decay -exp(w)
+            p_w = tl.make_block_ptr(w + (bos*H + i_h) * K, (T, K), (H*K, 1), (i_t * BT, i_k * BK), (BT, BK), (1, 0))
+            b_w = tl.load(p_w, boundary_check=(0, 1)).to(tl.float32)
+            b_c = b_c * -exp(b_w)
         tl.store(p_dw, b_c.to(p_dw.dtype.element_ty), boundary_check=(0, 1))
         if i_t >= 0:
             b_z += tl.sum(b_dw, 0)
@@ -359,6 +375,7 @@ def fused_recurrent_rwkv6_fwd(
     output_final_state: bool = False,
     reverse: bool = False,
     cu_seqlens: Optional[torch.LongTensor] = None,
+    use_neg_exp_w_in_kernel: bool = False,
 ):
     B, T, H, K, V = *k.shape, v.shape[-1]
     N = B if cu_seqlens is None else len(cu_seqlens) - 1
@@ -389,6 +406,7 @@ def fused_recurrent_rwkv6_fwd(
         BK=BK,
         BV=BV,
         REVERSE=reverse,
+        NEG_EXP_W=use_neg_exp_w_in_kernel,
     )
     o = o.sum(0)
     return o, ht
@@ -405,6 +423,7 @@ def fused_recurrent_rwkv6_bwd(
     initial_state: Optional[torch.Tensor] = None,
     reverse: bool = False,
     cu_seqlens: Optional[torch.LongTensor] = None,
+    use_neg_exp_w_in_kernel: bool = False,
 ):
     B, T, H, K, V = *k.shape, v.shape[-1]
     N = B if cu_seqlens is None else len(cu_seqlens) - 1
@@ -435,6 +454,7 @@ def fused_recurrent_rwkv6_bwd(
         BK=BK,
         BV=BV,
         REVERSE=reverse,
+        NEG_EXP_W=use_neg_exp_w_in_kernel,
     )
     dq = dq.sum(0)
     dq1 = dq1.sum(0)
@@ -469,6 +489,7 @@ def fused_recurrent_rwkv6_bwd(
         BK=BK,
         BV=BV,
         REVERSE=reverse,
+        NEG_EXP_W=use_neg_exp_w_in_kernel,
     )
     dk = dk.sum(0)
     dk1 = dk1.sum(0)
@@ -479,6 +500,7 @@ def fused_recurrent_rwkv6_bwd(
     fused_recurrent_rwkv6_bwd_kernel_dw[grid](
         q,
         k,
+        w,
         dq1,
         dk1,
         dw,
@@ -488,6 +510,7 @@ def fused_recurrent_rwkv6_bwd(
         H=H,
         K=K,
         REVERSE=not reverse,
+        NEG_EXP_W=use_neg_exp_w_in_kernel,
     )
     du = (do.float() * v).sum(-1, True, dtype=torch.float) * q * k * scale
     du = du.sum((0, 1))
@@ -511,6 +534,7 @@ class FusedRecurrentRWKV6Function(torch.autograd.Function):
         output_final_state: bool = False,
         reverse: bool = False,
         cu_seqlens: Optional[torch.LongTensor] = None,
+        use_neg_exp_w_in_kernel: bool = False,
     ):
         o, ht = fused_recurrent_rwkv6_fwd(
             q=q,
@@ -523,11 +547,13 @@ class FusedRecurrentRWKV6Function(torch.autograd.Function):
             output_final_state=output_final_state,
             reverse=reverse,
             cu_seqlens=cu_seqlens,
+            use_neg_exp_w_in_kernel=use_neg_exp_w_in_kernel,
         )
         ctx.save_for_backward(q, k, v, w, u, initial_state)
         ctx.scale = scale
         ctx.reverse = reverse
         ctx.cu_seqlens = cu_seqlens
+        ctx.use_neg_exp_w_in_kernel = use_neg_exp_w_in_kernel
         return o.to(v), ht
 
     @staticmethod
@@ -547,9 +573,10 @@ class FusedRecurrentRWKV6Function(torch.autograd.Function):
             initial_state=initial_state,
             reverse=ctx.reverse,
             cu_seqlens=ctx.cu_seqlens,
+            use_neg_exp_w_in_kernel=ctx.use_neg_exp_w_in_kernel,
         )
         dh0 = dh0.to(initial_state) if dh0 is not None else dh0
-        return dq.to(q), dk.to(k), dv.to(v), dw.to(w), du.to(u), None, dh0, None, None, None
+        return dq.to(q), dk.to(k), dv.to(v), dw.to(w), du.to(u), None, dh0, None, None, None, None
 
 
 def fused_recurrent_rwkv6(
@@ -563,6 +590,7 @@ def fused_recurrent_rwkv6(
     output_final_state: bool = False,
     reverse: bool = False,
     cu_seqlens: Optional[torch.LongTensor] = None,
+    use_neg_exp_w_in_kernel: bool = False,
     head_first: bool = False
 ) -> Tuple[torch.Tensor, torch.Tensor]:
     r"""
@@ -592,6 +620,9 @@ def fused_recurrent_rwkv6(
         cu_seqlens (torch.LongTensor):
             Cumulative sequence lengths of shape `[N+1]` used for variable-length training,
             consistent with the FlashAttention API.
+        use_neg_exp_w_in_kernel (Optional[bool]):
+            If `True`, `w` holds raw decay logits and the log decays `-exp(w)` are computed inside the kernels,
+            which saves a full elementwise pass over `w`. Default: `False`.
         head_first (Optional[bool]):
             Whether the inputs are in the head-first format. Default: `False`.
             This argument has been deprecated.
@@ -669,5 +700,40 @@ def fused_recurrent_rwkv6(
         output_final_state,
         reverse,
         cu_seqlens,
+        use_neg_exp_w_in_kernel,
     )
     return o, final_state
+
+
+@torch_compile
+def fused_recurrent_rwkv6_step(
+    r: torch.Tensor,
+    k: torch.Tensor,
+    v: torch.Tensor,
+    w: torch.Tensor,
+    u: torch.Tensor,
+    scale: float,
+    initial_state: Optional[torch.Tensor] = None,
+    output_final_state: bool = False,
+    use_neg_exp_w_in_kernel: bool = False,
+) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    r"""
+    A single decoding step of `fused_recurrent_rwkv6` for inputs with `T=1`.
+
+    With one token the recurrence reduces to a few pointwise ops and reductions over `[B, H, K, V]`,
+    which are compiled into one kernel instead of paying the launches of the Triton path.
+    Arguments follow `fused_recurrent_rwkv6`, with `r/k/v/w` of shape `[B, 1, H, *]`.
+    """
+    dtype = v.dtype
+    r, k, v, w = (i.squeeze(1).float() for i in (r, k, v, w))
+    if use_neg_exp_w_in_kernel:
+        w = -w.exp()
+    # [B, H, K, V]
+    kv = k[..., None] * v[..., None, :]
+    if initial_state is None:
+        h = kv.new_zeros(kv.shape)
+    else:
+        h = initial_state.float()
+    o = ((h + u.float()[..., None] * kv) * (r * scale)[..., None]).sum(-2)
+    h = h * w.exp()[..., None] + kv
+    return o.unsqueeze(1).to(dtype), (h if output_final_state else None)
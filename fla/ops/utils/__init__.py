@@ -20,7 +20,7 @@ from .index import (
     get_max_num_splits
 )
 from .logsumexp import logsumexp_fwd
-from .matmul import addmm, matmul
+from .matmul import addmm, int8_weight_matmul, matmul
 from .pack import pack_sequence, unpack_sequence
 from .pooling import mean_pooling
 from .softmax import softmax_bwd, softmax_fwd
@@ -45,6 +45,7 @@ __all__ = [
     'prepare_token_indices',
     'logsumexp_fwd',
     'addmm',
+    'int8_weight_matmul',
     'matmul',
     'mean_pooling',
     'softmax_bwd',
@@ -243,3 +243,104 @@ def addmm(
         X_DIM=x.dim(),
     )
     return c.squeeze(0) if a_dim == 2 else c
+
+
+@triton.heuristics({
+    'HAS_BIAS': lambda args: args['bias'] is not None,
+})
+@triton.autotune(
+    configs=[
+        triton.Config({'BN': BN, 'BK': BK}, num_warps=num_warps, num_stages=num_stages)
+        for BN in [32, 64, 128]
+        for BK in [64, 128]
+        for num_warps in [2, 4]
+        for num_stages in [2, 3]
+    ],
+    key=['N', 'K', 'BM']
+)
+@triton.jit
+def int8_weight_matmul_kernel(
+    x,
+    w,
+    scale,
+    bias,
+    y,
+    M,
+    N,
+    K,
+    BM: tl.constexpr,
+    BN: tl.constexpr,
+    BK: tl.constexpr,
+    HAS_BIAS: tl.constexpr,
+):
+    """Kernel for computing Y = (X @ W^T) * scale + bias.
+    X has shape (M, K), W has shape (N, K) in int8 and is dequantized in registers, so it is read once in 1 byte.
+    """
+    i_n, i_m = tl.program_id(0), tl.program_id(1)
+
+    p_x = tl.make_block_ptr(x, (M, K), (K, 1), (i_m * BM, 0), (BM, BK), (1, 0))
+    p_w = tl.make_block_ptr(w, (K, N), (1, K), (0, i_n * BN), (BK, BN), (0, 1))
+
+    b_y = tl.zeros((BM, BN), dtype=tl.float32)
+    for _ in range(0, tl.cdiv(K, BK)):
+        # [BM, BK]
+        b_x = tl.load(p_x, boundary_check=(0, 1))
+        # [BK, BN]
+        b_w = tl.load(p_w, boundary_check=(0, 1)).to(b_x.dtype)
+        b_y = tl.dot(b_x, b_w, acc=b_y)
+        p_x = tl.advance(p_x, (0, BK))
+        p_w = tl.advance(p_w, (BK, 0))
+
+    # the per-output-channel scale is applied once in the epilogue instead of on every weight element
+    o_n = i_n * BN + tl.arange(0, BN)
+    m_n = o_n < N
+    b_y *= tl.load(scale + o_n, mask=m_n, other=0.).to(tl.float32)[None, :]
+    if HAS_BIAS:
+        b_y += tl.load(bias + o_n, mask=m_n, other=0.).to(tl.float32)[None, :]
+
+    p_y = tl.make_block_ptr(y, (M, N), (N, 1), (i_m * BM, i_n * BN), (BM, BN), (1, 0))
+    tl.store(p_y, b_y.to(p_y.dtype.element_ty), boundary_check=(0, 1))
+
+
+@input_guard
+def int8_weight_matmul(
+    x: torch.Tensor,
+    weight: torch.Tensor,
+    scale: torch.Tensor,
+    bias: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    r"""
+    Computes `(x @ weight.T) * scale + bias` against an int8 weight without materializing a dequantized copy of it.
+
+    Meant for the small-`M` GEMMs of decoding, which are bound by the bytes of weight read.
+
+    Args:
+        x (torch.Tensor):
+            Activations of shape `[M, K]`.
+        weight (torch.Tensor):
+            int8 weight of shape `[N, K]`.
+        scale (torch.Tensor):
+            Per-output-channel scales of shape `[N]`.
+        bias (Optional[torch.Tensor]):
+            Bias of shape `[N]`. Default: `None`.
+
+    Returns:
+        Output of shape `[M, N]` in the dtype of `x`.
+    """
+    assert x.dim() == 2 and weight.dim() == 2, "x and weight must be 2D"
+    assert weight.dtype == torch.int8, f"weight must be int8, got {weight.dtype}"
+    M, K = x.shape
+    N, K_w = weight.shape
+    assert K == K_w, f"Incompatible K dimension: x {x.shape}, weight {weight.shape}"
+
+    y = x.new_empty(M, N)
+    # `tl.dot` needs at least 16 rows, decoding batches rarely exceed 64
+    BM = min(max(16, triton.next_power_of_2(M)), 64)
+
+    def grid(meta): return (triton.cdiv(N, meta['BN']), triton.cdiv(M, BM))
+    int8_weight_matmul_kernel[grid](
+        x, weight, scale, bias, y,
+        M, N, K,
+        BM=BM,
+    )
+    return y
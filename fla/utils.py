@@ -164,6 +164,26 @@ def input_guard(
 contiguous = input_guard
 
 
+def _get_torch_compile() -> Callable[[Callable], Callable]:
+    """
+    Returns a `torch.compile(fullgraph=True)` decorator for small elementwise reference ops,
+    or an identity decorator if compiling is disabled via `FLA_USE_COMPILE=0` or unsupported (Python < 3.11).
+    """
+    if os.getenv('FLA_USE_COMPILE', '1').lower() not in ('1', 'true', 'yes'):
+        logger.info('torch.compile is disabled by `FLA_USE_COMPILE`, using identity decorator instead')
+        return lambda fn: fn
+    if sys.version_info < (3, 11):
+        logger.warning(
+            f'torch.compile is not available in Python {sys.version_info.major}.{sys.version_info.minor}, '
+            'using identity decorator instead'
+        )
+        return lambda fn: fn
+    return torch.compile(fullgraph=True)
+
+
+torch_compile = _get_torch_compile()
+
+
 def require_version(version, hint):
     """
     Perform a runtime check of the dependency versions, using the exact same syntax used by pip.
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import copy
+
 import pytest
 import torch
+import torch.nn as nn
 
+from fla.layers.rwkv6 import CachedGraphRunner, Int8Linear, RWKV6Attention
 from fla.models import RWKV6Config
+from fla.models.utils import Cache
+from fla.utils import assert_close, device
 
 from .test_modeling_base import run_test_generation, run_test_model_forward_backward
 
@@ -55,3 +61,177 @@ def test_generation(
     dtype: torch.dtype,
 ):
     run_test_generation(L, B, T, H, D, RWKV6Config, dtype)
+
+
+# ===================================================================================
+# Test for the Token-Shift Workspace
+# ===================================================================================
+def test_attention_delta_workspace():
+    torch.manual_seed(42)
+    B, T, H, D = 2, 16, 4, 64
+    layer = RWKV6Attention(hidden_size=H * D, num_heads=H, layer_idx=0).to(device)
+    x = torch.randn(B, T + 1, H * D, device=device)
+
+    with torch.no_grad():
+        cache = Cache()
+        ref = layer(x[:, :T].clone())[0]
+        tri = layer(x[:, :T].clone(), past_key_values=cache, use_cache=True)[0]
+        assert_close('o', ref, tri, 1e-3)
+        # the prefill buffer lives on the cache, so it goes away together with it
+        assert cache.workspaces[('rwkv6_delta', x.device, x.dtype)].numel() == B * T * H * D
+        # decoding steps never read it, so it is released once decoding starts
+        layer(x[:, T:].clone(), past_key_values=cache, use_cache=True)
+        assert len(cache.workspaces) == 0
+
+
+# ===================================================================================
+# Test for Int8 Quantization
+# ===================================================================================
+@pytest.mark.parametrize(
+    ['N', 'input_dim', 'output_dim', 'bias', 'dtype'],
+    [
+        pytest.param(*test, id="N{}-input_dim{}-output_dim{}-bias{}-{}".format(*test))
+        for test in [
+            # `torch._int_mm` path
+            (64, 256, 512, False, torch.float16),
+            (100, 512, 256, True, torch.bfloat16),
+            # weight-only int8 kernel for too few tokens
+            (1, 256, 512, False, torch.float16),
+            (16, 512, 256, True, torch.bfloat16),
+        ]
+    ]
+)
+@pytest.mark.skipif(device != 'cuda', reason='`torch._int_mm` requires CUDA')
+def test_int8_linear(
+    N: int,
+    input_dim: int,
+    output_dim: int,
+    bias: bool,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    linear = nn.Linear(input_dim, output_dim, bias=bias).to(device=device, dtype=dtype)
+    x = torch.randn(N, input_dim, device=device, dtype=dtype)
+
+    with torch.no_grad():
+        ref = linear(x)
+        tri = Int8Linear.from_linear(linear)(x)
+    assert tri.dtype == ref.dtype
+    assert_close('y', ref, tri, 0.02)
+
+
+@pytest.mark.parametrize(
+    ['N', 'dtype'],
+    [
+        pytest.param(*test, id="N{}-{}".format(*test))
+        for test in [
+            (1, torch.float16),
+            (16, torch.bfloat16),
+        ]
+    ]
+)
+@pytest.mark.skipif(device != 'cuda', reason='`torch._int_mm` requires CUDA')
+def test_int8_linear_decode_memory(
+    N: int,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    dim = 4096
+    layer = Int8Linear.from_linear(nn.Linear(dim, dim, bias=False).to(device=device, dtype=dtype))
+    x = torch.randn(N, dim, device=device, dtype=dtype)
+
+    with torch.no_grad():
+        # the first call autotunes, which allocates buffers of its own
+        layer(x)
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+        allocated = torch.cuda.memory_allocated()
+        layer(x)
+        torch.cuda.synchronize()
+    # a dequantized 16-bit copy of the weight alone would take twice the bytes of the int8 weight
+    assert torch.cuda.max_memory_allocated() - allocated < layer.weight.numel()
+
+
+@pytest.mark.parametrize(
+    ['B', 'T', 'H', 'D', 'dtype'],
+    [
+        pytest.param(*test, id="B{}-T{}-H{}-D{}-{}".format(*test))
+        for test in [
+            (2, 1, 4, 64, torch.float16),
+            (2, 128, 4, 64, torch.float16),
+        ]
+    ]
+)
+@pytest.mark.skipif(device != 'cuda', reason='`torch._int_mm` requires CUDA')
+def test_attention_quantize(
+    B: int,
+    T: int,
+    H: int,
+    D: int,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    layer = RWKV6Attention(hidden_size=H * D * 2, num_heads=H, layer_idx=0).to(device=device, dtype=dtype)
+    quantized = copy.deepcopy(layer).quantize_()
+    x = torch.randn(B, T, H * D * 2, device=device, dtype=dtype)
+
+    with torch.no_grad():
+        ref = layer(x.clone())[0]
+        tri = quantized(x.clone())[0]
+    assert_close('o', ref, tri, 0.05)
+
+
+# ===================================================================================
+# Test for CUDA Graphs
+# ===================================================================================
+@pytest.mark.skipif(device != 'cuda', reason='CUDA graphs require CUDA')
+def test_cached_graph_runner():
+    torch.manual_seed(42)
+    linear = nn.Linear(64, 64).to(device)
+    runner = CachedGraphRunner(lambda x: (linear(x),), max_graphs=2)
+    x = torch.randn(4, 64, device=device)
+
+    with torch.no_grad():
+        assert_close('replay', linear(x), runner(x)[0], 1e-4)
+        # replays with fresh inputs must not return the values captured at recording time
+        x = torch.randn(4, 64, device=device)
+        assert_close('replay', linear(x), runner(x)[0], 1e-4)
+
+        # in-place updates keep the addresses the graph reads from
+        linear.load_state_dict({'weight': torch.randn(64, 64), 'bias': torch.randn(64)})
+        assert_close('load_state_dict', linear(x), runner(x)[0], 1e-4)
+
+        # replaced storage needs a reset to trigger a new capture instead of replaying stale memory
+        linear.weight.data = torch.randn_like(linear.weight)
+        runner.reset()
+        assert_close('replaced', linear(x), runner(x)[0], 1e-4)
+
+        # one graph per batch size, evicting the least recently used beyond `max_graphs`
+        for B in (1, 2, 4, 8):
+            x = torch.randn(B, 64, device=device)
+            assert_close(f'B{B}', linear(x), runner(x)[0], 1e-4)
+        assert len(runner.graphs) == 2
+
+
+@pytest.mark.skipif(device != 'cuda', reason='CUDA graphs require CUDA')
+def test_attention_decode_cuda_graph():
+    torch.manual_seed(42)
+    B, T, H, D = 2, 16, 4, 64
+    ref = RWKV6Attention(hidden_size=H * D, num_heads=H, layer_idx=0).to(device)
+    tri = copy.deepcopy(ref)
+    tri.use_decode_cuda_graph = True
+    x = torch.randn(B, T + 1, H * D, device=device)
+
+    with torch.no_grad():
+        ref_cache, tri_cache = Cache(), Cache()
+        ref(x[:, :T].clone(), past_key_values=ref_cache, use_cache=True)
+        tri(x[:, :T].clone(), past_key_values=tri_cache, use_cache=True)
+        ref_o = ref(x[:, T:].clone(), past_key_values=ref_cache, use_cache=True)[0]
+        tri_o = tri(x[:, T:].clone(), past_key_values=tri_cache, use_cache=True)[0]
+        assert ref._decode_graph_runner is None
+        assert len(tri._decode_graph_runner.graphs) == 1
+        assert_close('o', ref_o, tri_o, 1e-3)
+
+    # moving or casting the weights drops the graphs captured against the old ones
+    tri.half()
+    assert tri._decode_graph_runner is None
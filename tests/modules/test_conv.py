@@ -251,6 +251,7 @@ def test_conv_varlen(
             (2, 1024, 1024, 4, None, False, True, torch.float32),
             (2, 64, 128, 3, None, True, False, torch.float16),
             (2, 128, 128, 4, None, False, False, torch.float16),
+            (2, 64, 128, 5, "swish", True, True, torch.float32),
         ]
     ]
 )
@@ -712,3 +713,115 @@ def test_conv_cache_backward(
     names = ["x", "weight", "bias", "residual", "cache"]
     for name, g_ref, g_tri in zip(names, grads_ref, grads_tri):
         assert_close(name, g_ref, g_tri, ratio=1e-3)
+
+
+@pytest.mark.parametrize(
+    ('B', 'T', 'D', 'W', 'activation', 'has_bias', 'has_residual', 'dtype'),
+    [
+        pytest.param(*test, id="B{0}_T{1}_D{2}_W{3}_activation{4}_has_bias{5}_has_residual{6}_{7}".format(*test))
+        for test in [
+            (2, 64, 128, 3, "swish", True, True, torch.float32),
+            (3, 100, 128, 4, "swish", False, True, torch.float32),
+            (2, 128, 256, 4, None, True, False, torch.float32),
+        ]
+    ]
+)
+def test_conv_mask(
+    B: int,
+    T: int,
+    D: int,
+    W: int,
+    activation: str,
+    has_bias: bool,
+    has_residual: bool,
+    dtype: torch.dtype
+):
+    torch.manual_seed(42)
+
+    x = torch.randn(B, T, D).to(device, dtype).requires_grad_(True)
+    weight = torch.randn(D, W).to(device, dtype).requires_grad_(True)
+    bias = torch.randn(D).to(device, dtype).requires_grad_(True) if has_bias else None
+    residual = torch.randn(B, T, D).to(device, dtype).requires_grad_(True) if has_residual else None
+    # left padding
+    mask = (torch.arange(T, device=device)[None, :] >= torch.randint(0, T // 2, (B, 1), device=device)).long()
+    dy = torch.randn(B, T, D).to(device, dtype)
+    dht = torch.randn(B, D, W).to(device, dtype)
+
+    ref, ref_ht = causal_conv1d(
+        x * mask.unsqueeze(-1),
+        weight,
+        bias,
+        residual=residual,
+        output_final_state=True,
+        activation=activation
+    )
+    ((ref * dy).sum() + (ref_ht * dht).sum()).backward()
+    ref_dx, x.grad = x.grad, None
+    ref_dw, weight.grad = weight.grad, None
+    if has_bias:
+        ref_db, bias.grad = bias.grad, None
+
+    tri, tri_ht = causal_conv1d(
+        x,
+        weight,
+        bias,
+        residual=residual,
+        output_final_state=True,
+        activation=activation,
+        mask=mask
+    )
+    ((tri * dy).sum() + (tri_ht * dht).sum()).backward()
+    tri_dx, x.grad = x.grad, None
+    tri_dw, weight.grad = weight.grad, None
+    if has_bias:
+        tri_db, bias.grad = bias.grad, None
+
+    assert_close(" y", ref, tri, 1e-3)
+    assert_close(" ht", ref_ht, tri_ht, 1e-3)
+    assert_close("dx", ref_dx, tri_dx, 1e-3)
+    assert_close("dw", ref_dw, tri_dw, 1e-3)
+    if has_bias:
+        assert_close("db", ref_db, tri_db, 1e-3)
+
+
+@pytest.mark.parametrize(
+    ('B', 'T', 'D', 'W', 'activation', 'dtype'),
+    [
+        pytest.param(*test, id="B{0}_T{1}_D{2}_W{3}_activation{4}_{5}".format(*test))
+        for test in [
+            (2, 64, 128, 3, "swish", torch.float32),
+            (3, 128, 256, 4, None, torch.float32),
+        ]
+    ]
+)
+def test_conv_cache_backward_without_final_state(
+    B: int,
+    T: int,
+    D: int,
+    W: int,
+    activation: str,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+
+    x = torch.randn(B, T, D, device=device, dtype=dtype, requires_grad=True)
+    weight = torch.randn(D, W, device=device, dtype=dtype, requires_grad=True)
+    cache = torch.randn(B, D, W - 1, device=device, dtype=dtype, requires_grad=True)
+    dy = torch.randn(B, T, D, device=device, dtype=dtype)
+
+    ref, _ = causal_conv1d_ref_torch(
+        x.transpose(1, 2),
+        weight,
+        initial_state=cache,
+        output_final_state=True,
+        activation=activation,
+    )
+    ref_dx, ref_dw, ref_dh0 = torch.autograd.grad((ref.transpose(1, 2) * dy).sum(), (x, weight, cache))
+
+    triton_cache = torch.cat([torch.zeros(B, D, 1, device=device, dtype=dtype), cache], dim=-1)
+    tri, _ = causal_conv1d(x, weight=weight, initial_state=triton_cache, activation=activation)
+    tri_dx, tri_dw, tri_dh0 = torch.autograd.grad((tri * dy).sum(), (x, weight, cache))
+
+    assert_close("dx", ref_dx, tri_dx, 1e-3)
+    assert_close("dw", ref_dw, tri_dw, 1e-3)
+    assert_close("dh0", ref_dh0, tri_dh0, 1e-3)
@@ -5,7 +5,8 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
-from fla.modules import FusedLayerNormGated, FusedRMSNormGated
+from fla.modules import FusedGroupNormGated, FusedLayerNormGated, FusedRMSNormGated
+from fla.modules.layernorm import GroupNormRef
 from fla.utils import assert_close, device
 
 
@@ -91,3 +92,40 @@ def test_rmsnorm_gated(B: int, H: int, T: int, D: int, activation: str):
     assert_close('dx', ref_dx, tri_dx, 1e-3)
     assert_close('dg', ref_dg, tri_dg, 1e-3)
     assert_close('dw', ref_dw, tri_dw, 1e-3)
+
+
+@pytest.mark.parametrize(
+    ('B', 'T', 'D', 'G', 'activation', 'is_rms_norm'),
+    [
+        pytest.param(*test, id=f"B{test[0]}_T{test[1]}_D{test[2]}_G{test[3]}_{test[4]}_rms{test[5]}")
+        for test in [
+            (2, 1,    256,  4, "swish",   False),
+            (2, 512,  512,  8, "swish",   False),
+            (2, 512,  512,  1, "sigmoid", False),
+            (2, 2048, 4096, 4, "silu",    False),
+            (2, 50,   200,  4, "silu",    True),
+        ]
+    ]
+)
+def test_groupnorm_gated(B: int, T: int, D: int, G: int, activation: str, is_rms_norm: bool):
+    torch.manual_seed(42)
+    x = torch.randn(B, T, D).to(device).requires_grad_(True)
+    g = torch.randn(B, T, D).to(device).requires_grad_(True)
+    ref = GroupNormRef(num_groups=G, hidden_size=D, bias=True, is_rms_norm=is_rms_norm).to(device)
+    tri = FusedGroupNormGated(G, D, bias=True, activation=activation, is_rms_norm=is_rms_norm).to(device)
+    nn.init.normal_(ref.weight)
+    nn.init.normal_(ref.bias)
+    tri.weight.data.copy_(ref.weight.data)
+    tri.bias.data.copy_(ref.bias.data)
+
+    act_fn = F.sigmoid if activation == "sigmoid" else F.silu
+    ref_y = ref(x) * act_fn(g)
+    tri_y = tri(x, g)
+    ref_dx, ref_dg, ref_dw, ref_db = torch.autograd.grad(ref_y.sum(), (x, g, ref.weight, ref.bias))
+    tri_dx, tri_dg, tri_dw, tri_db = torch.autograd.grad(tri_y.sum(), (x, g, tri.weight, tri.bias))
+
+    assert_close(' y', ref_y, tri_y, 1e-3)
+    assert_close('dx', ref_dx, tri_dx, 1e-3)
+    assert_close('dg', ref_dg, tri_dg, 1e-3)
+    assert_close('dw', ref_dw, tri_dw, 1e-3)
+    assert_close('db', ref_db, tri_db, 1e-3)
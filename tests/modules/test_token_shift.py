@@ -132,3 +132,17 @@ def test_all_with_and_without_varlen(B, T, H, cu_seqlens, split_at):
     dtype = torch.float
     assert cu_seqlens is None, "This test is for cu_seqlens=None case"
     _check_passing_vs_whole(B, T, H, cu_seqlens, dtype, split_at)
+
+
+@pytest.mark.parametrize('T', [1, 512, 4100])
+@pytest.mark.parametrize('H', [2560])
+@torch.no_grad()
+def test_token_shift_out(T, H):
+    torch.manual_seed(42)
+    x = torch.randn(4, T, H, device=device)
+    out = torch.empty(4 * T * H + 7, device=device)[:4 * T * H].view_as(x)
+
+    ref = token_shift_ref(x)
+    tri = token_shift(x, out=out)
+    assert tri.data_ptr() == out.data_ptr()
+    assert_close('x', ref, tri, 1e-3)
@@ -7,6 +7,8 @@ import torch
 import torch.nn.functional as F
 
 from fla.ops.delta_rule import chunk_delta_rule, fused_recurrent_delta_rule
+from fla.ops.delta_rule.fused_recurrent import FusedRecurrentFunction
+from fla.ops.delta_rule.naive import delta_rule_recurrence
 from fla.utils import assert_close, device, device_platform
 
 
@@ -152,3 +154,191 @@ def test_chunk_varlen(
     assert_close('dv', ref_dv, tri_dv, 0.008)
     assert_close('db', ref_dbeta, tri_dbeta, 0.008)
     assert_close('dh0', ref_dh0, tri_dh0, 0.008)
+
+
+@pytest.mark.parametrize(
+    ('B', 'H', 'K', 'V', 'beta_type', 'use_h0', 'use_qk_l2norm_in_kernel', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-H{}-K{}-V{}-beta_{}-h0{}-l2norm{}-{}".format(*test))
+        for test in [
+            (1, 1, 64, 64, 'scalar', False, False, torch.float16),
+            (2, 4, 64, 64, 'scalar', True, False, torch.float16),
+            (2, 4, 60, 100, 'headwise', True, False, torch.float16),
+            (3, 2, 128, 128, 'headwise', False, True, torch.float16),
+            (2, 4, 64, 128, 'none', True, False, torch.float16),
+            (4, 8, 128, 64, 'none', False, True, torch.bfloat16),
+        ]
+    ]
+)
+@pytest.mark.skipif(
+    device_platform == 'intel',
+    reason='Intel Triton Failure'
+)
+def test_fused_recurrent_decode(
+    B: int,
+    H: int,
+    K: int,
+    V: int,
+    beta_type: str,
+    use_h0: bool,
+    use_qk_l2norm_in_kernel: bool,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    q = torch.randn(B, 1, H, K, dtype=dtype, device=device)
+    k = torch.randn(B, 1, H, K, dtype=dtype, device=device)
+    if not use_qk_l2norm_in_kernel:
+        k = F.normalize(k.float(), p=2, dim=-1).to(dtype)
+    v = torch.randn(B, 1, H, V, dtype=dtype, device=device)
+    if beta_type == 'scalar':
+        beta = torch.rand(B, 1, H, dtype=dtype, device=device).sigmoid()
+    elif beta_type == 'headwise':
+        beta = torch.rand(B, 1, H, V, dtype=dtype, device=device).sigmoid()
+    else:
+        beta = None
+    h0 = torch.randn(B, H, K, V, dtype=torch.float32, device=device) if use_h0 else None
+    scale = K ** -0.5
+
+    with torch.no_grad():
+        # T == 1 without gradients is dispatched to the single-step decoding kernel
+        tri, tri_ht = fused_recurrent_delta_rule(
+            q=q,
+            k=k,
+            v=v,
+            beta=beta,
+            scale=scale,
+            initial_state=h0,
+            output_final_state=True,
+            use_qk_l2norm_in_kernel=use_qk_l2norm_in_kernel,
+        )
+        ref, ref_ht = FusedRecurrentFunction.apply(q, k, v, beta, scale, h0, True, use_qk_l2norm_in_kernel, None)
+
+    assert_close('o', ref, tri, 0.002)
+    assert_close('ht', ref_ht, tri_ht, 0.002)
+
+
+@pytest.mark.parametrize(
+    ('B', 'T', 'H', 'K', 'V', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-T{}-H{}-K{}-V{}-{}".format(*test))
+        for test in [
+            (1, 63, 1, 64, 32, torch.float16),
+            (2, 100, 4, 60, 100, torch.float16),
+            (2, 500, 3, 128, 128, torch.float16),
+        ]
+    ]
+)
+@pytest.mark.skipif(
+    device_platform == 'intel',
+    reason='Intel Triton Failure'
+)
+def test_fused_recurrent_no_beta(
+    B: int,
+    T: int,
+    H: int,
+    K: int,
+    V: int,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    q = torch.randn(B, T, H, K, dtype=dtype)
+    k = F.normalize(torch.randn(B, T, H, K, dtype=torch.float32), p=2, dim=-1).to(dtype)
+    v = torch.randn(B, T, H, V, dtype=dtype)
+    h0 = torch.randn(B, H, K, V, dtype=torch.float32)
+    q, k, v, h0 = map(lambda x: x.to(device).requires_grad_(True), (q, k, v, h0))
+    do = torch.rand_like(v)
+    dht = torch.rand_like(h0)
+
+    ref, ref_ht = fused_recurrent_delta_rule(
+        q=q.clone(),
+        k=k.clone(),
+        v=v.clone(),
+        beta=torch.ones(B, T, H, dtype=dtype, device=device),
+        output_final_state=True,
+        initial_state=h0.clone(),
+    )
+    ((ref * do).sum() + (ref_ht * dht).sum()).backward()
+    ref_dq, ref_dk, ref_dv, ref_dh0 = q.grad, k.grad, v.grad, h0.grad
+    q.grad = k.grad = v.grad = h0.grad = None
+
+    tri, tri_ht = fused_recurrent_delta_rule(
+        q=q.clone(),
+        k=k.clone(),
+        v=v.clone(),
+        beta=None,
+        output_final_state=True,
+        initial_state=h0.clone(),
+    )
+    ((tri * do).sum() + (tri_ht * dht).sum()).backward()
+    tri_dq, tri_dk, tri_dv, tri_dh0 = q.grad, k.grad, v.grad, h0.grad
+
+    assert_close('o', ref, tri, 0.002)
+    assert_close('ht', ref_ht, tri_ht, 0.002)
+    assert_close('dq', ref_dq, tri_dq, 0.002)
+    assert_close('dk', ref_dk, tri_dk, 0.002)
+    assert_close('dv', ref_dv, tri_dv, 0.002)
+    assert_close('dh0', ref_dh0, tri_dh0, 0.002)
+
+
+@pytest.mark.parametrize(
+    ('B', 'T', 'H', 'K', 'V', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-T{}-H{}-K{}-V{}-{}".format(*test))
+        for test in [
+            (1, 63, 1, 64, 32, torch.float32),
+            (2, 100, 4, 60, 100, torch.float32),
+            (2, 300, 3, 64, 256, torch.float32),
+        ]
+    ]
+)
+@pytest.mark.skipif(
+    device_platform == 'intel',
+    reason='Intel Triton Failure'
+)
+def test_fused_recurrent(
+    B: int,
+    T: int,
+    H: int,
+    K: int,
+    V: int,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    q = torch.randn(B, T, H, K, dtype=dtype)
+    k = F.normalize(torch.randn(B, T, H, K, dtype=torch.float32), p=2, dim=-1).to(dtype)
+    v = torch.randn(B, T, H, V, dtype=dtype)
+    beta = torch.rand(B, T, H, dtype=dtype).sigmoid()
+    h0 = torch.randn(B, H, K, V, dtype=torch.float32)
+    q, k, v, beta, h0 = map(lambda x: x.to(device).requires_grad_(True), (q, k, v, beta, h0))
+    do = torch.rand_like(v)
+    dht = torch.rand_like(h0)
+
+    ref, ref_ht = delta_rule_recurrence(
+        *(x.clone().transpose(1, 2) for x in (q, k, v, beta)),
+        initial_state=h0.clone(),
+        output_final_state=True,
+    )
+    ref = ref.transpose(1, 2)
+    ((ref * do).sum() + (ref_ht * dht).sum()).backward()
+    ref_dq, ref_dk, ref_dv, ref_dbeta, ref_dh0 = q.grad, k.grad, v.grad, beta.grad, h0.grad
+    q.grad = k.grad = v.grad = beta.grad = h0.grad = None
+
+    # V > 32 splits V into several blocks, whose dq/dk/dbeta are accumulated atomically in the bwd kernel
+    tri, tri_ht = fused_recurrent_delta_rule(
+        q=q.clone(),
+        k=k.clone(),
+        v=v.clone(),
+        beta=beta.clone(),
+        output_final_state=True,
+        initial_state=h0.clone(),
+    )
+    ((tri * do).sum() + (tri_ht * dht).sum()).backward()
+    tri_dq, tri_dk, tri_dv, tri_dbeta, tri_dh0 = q.grad, k.grad, v.grad, beta.grad, h0.grad
+
+    assert_close('o', ref, tri, 0.002)
+    assert_close('ht', ref_ht, tri_ht, 0.002)
+    assert_close('dq', ref_dq, tri_dq, 0.002)
+    assert_close('dk', ref_dk, tri_dk, 0.002)
+    assert_close('dv', ref_dv, tri_dv, 0.002)
+    assert_close('db', ref_dbeta, tri_dbeta, 0.002)
+    assert_close('dh0', ref_dh0, tri_dh0, 0.002)
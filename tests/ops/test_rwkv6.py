@@ -8,7 +8,8 @@ import torch
 import torch.nn.functional as F
 
 from fla.ops.rwkv6 import chunk_rwkv6
-from fla.ops.rwkv6.fused_recurrent import fused_recurrent_rwkv6
+from fla.ops.rwkv6.fused_addcmul import fused_addcmul_rwkv6, fused_addcmul_rwkv6_ref, fused_lerp_rwkv6
+from fla.ops.rwkv6.fused_recurrent import fused_recurrent_rwkv6, fused_recurrent_rwkv6_step
 from fla.utils import assert_close, device, device_platform
 
 
@@ -192,3 +193,187 @@ def test_chunk_varlen(
     assert_close('dw', ref_dw, tri_dw, 0.005)
     assert_close('du', ref_du, tri_du, 0.005)
     assert_close('dh0', ref_dh0, tri_dh0, 0.005)
+
+
+@pytest.mark.parametrize(
+    ('B', 'T', 'D', 'use_mask', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-T{}-D{}-mask{}-{}".format(*test))
+        for test in [
+            (1, 1, 256, False, torch.float32),
+            (2, 100, 512, False, torch.float32),
+            (2, 100, 512, True, torch.float32),
+            (4, 1024, 512, True, torch.bfloat16),
+        ]
+    ]
+)
+def test_fused_addcmul(
+    B: int,
+    T: int,
+    D: int,
+    use_mask: bool,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    hidden_states = torch.randn(B, T, D, dtype=dtype, device=device).requires_grad_()
+    delta = torch.randn(B, T, D, dtype=dtype, device=device).requires_grad_()
+    x = torch.randn(5, B, T, D, dtype=dtype, device=device).requires_grad_()
+    x_bias = torch.randn(5, D, dtype=dtype, device=device).requires_grad_()
+    inputs = (hidden_states, delta, x, x_bias)
+    mask = None
+    if use_mask:
+        mask = torch.ones(B, T, dtype=torch.long, device=device)
+        mask[:, :T // 4] = 0
+
+    ref = fused_addcmul_rwkv6_ref(*(i.float() for i in inputs), mask)
+    sum(r.sum() for r in ref).backward()
+    ref_grads = [i.grad.clone() for i in inputs]
+    for i in inputs:
+        i.grad = None
+
+    tri = fused_addcmul_rwkv6(*inputs, mask)
+    sum(t.sum() for t in tri).backward()
+    tri_grads = [i.grad.clone() for i in inputs]
+
+    ratio = 1e-5 if dtype == torch.float32 else 0.002
+    for name, ref_o, tri_o in zip(('xr', 'xw', 'xk', 'xv', 'xg'), ref, tri):
+        assert_close(name, ref_o, tri_o, ratio)
+    for name, ref_d, tri_d in zip(('dh', 'ddelta', 'dx', 'dx_bias'), ref_grads, tri_grads):
+        assert_close(name, ref_d, tri_d, ratio)
+
+
+@pytest.mark.parametrize(
+    ('B', 'D', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-D{}-{}".format(*test))
+        for test in [
+            (1, 256, torch.float32),
+            (16, 2048, torch.bfloat16),
+        ]
+    ]
+)
+def test_fused_lerp(
+    B: int,
+    D: int,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    hidden_states = torch.randn(B, 1, D, dtype=dtype, device=device)
+    shifted = torch.randn(B, 1, D, dtype=dtype, device=device)
+    x = torch.randn(5, B, 1, D, dtype=dtype, device=device)
+    x_bias = torch.randn(5, D, dtype=dtype, device=device)
+
+    ref = fused_addcmul_rwkv6_ref(*(i.float() for i in (hidden_states, shifted - hidden_states, x, x_bias)))
+    tri = fused_lerp_rwkv6(hidden_states, shifted, x, x_bias)
+    ratio = 1e-5 if dtype == torch.float32 else 0.005
+    for name, ref_o, tri_o in zip(('xr', 'xw', 'xk', 'xv', 'xg'), ref, tri):
+        assert_close(name, ref_o, tri_o, ratio)
+
+
+@pytest.mark.skipif(
+    device_platform == 'intel',
+    reason="Intel Triton Failure"
+)
+@pytest.mark.parametrize(
+    ('B', 'T', 'H', 'D', 'mode', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-T{}-H{}-D{}-{}-{}".format(*test))
+        for test in [
+            (1, 15, 2, 60, 'chunk', torch.float16),
+            (2, 500, 3, 64, 'chunk', torch.float16),
+            (1, 15, 2, 60, 'fused_recurrent', torch.float16),
+            (2, 500, 3, 64, 'fused_recurrent', torch.float16),
+        ]
+    ]
+)
+def test_neg_exp_w_in_kernel(
+    B: int,
+    T: int,
+    H: int,
+    D: int,
+    mode: str,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    os.environ['TRITON_F32_DEFAULT'] = 'ieee'
+    fn = chunk_rwkv6 if mode == 'chunk' else fused_recurrent_rwkv6
+
+    q = torch.randn((B, T, H, D), dtype=dtype, device=device).requires_grad_()
+    k = torch.randn((B, T, H, D), dtype=dtype, device=device).requires_grad_()
+    v = torch.randn((B, T, H, D), dtype=dtype, device=device).requires_grad_()
+    w = torch.randn((B, T, H, D), dtype=dtype, device=device).requires_grad_()
+    u = torch.randn(H, D, dtype=dtype, device=device).requires_grad_()
+    h0 = torch.randn(B, H, D, D, dtype=torch.float, device=device)
+    do = torch.randn_like(v)
+
+    ref, ref_ht = fn(q, k, v, -torch.exp(w.float()), u, initial_state=h0.clone(), output_final_state=True)
+    ((ref * do).sum()).backward()
+    ref_dq, q.grad = q.grad.clone(), None
+    ref_dk, k.grad = k.grad.clone(), None
+    ref_dv, v.grad = v.grad.clone(), None
+    ref_dw, w.grad = w.grad.clone(), None
+    ref_du, u.grad = u.grad.clone(), None
+
+    tri, tri_ht = fn(
+        q, k, v, w.float(), u,
+        initial_state=h0.clone(),
+        output_final_state=True,
+        use_neg_exp_w_in_kernel=True
+    )
+    ((tri * do).sum()).backward()
+    tri_dq, q.grad = q.grad.clone(), None
+    tri_dk, k.grad = k.grad.clone(), None
+    tri_dv, v.grad = v.grad.clone(), None
+    tri_dw, w.grad = w.grad.clone(), None
+    tri_du, u.grad = u.grad.clone(), None
+
+    assert_close('o', ref, tri, 0.004)
+    assert_close('ht', ref_ht, tri_ht, 0.005)
+    assert_close('dq', ref_dq, tri_dq, 0.005)
+    assert_close('dk', ref_dk, tri_dk, 0.005)
+    assert_close('dv', ref_dv, tri_dv, 0.005)
+    assert_close('dw', ref_dw, tri_dw, 0.005)
+    assert_close('du', ref_du, tri_du, 0.005)
+
+
+@pytest.mark.parametrize(
+    ('B', 'H', 'D', 'dtype'),
+    [
+        pytest.param(*test, id="B{}-H{}-D{}-{}".format(*test))
+        for test in [
+            (1, 2, 64, torch.float32),
+            (4, 4, 64, torch.float16),
+            (8, 16, 64, torch.bfloat16),
+        ]
+    ]
+)
+def test_fused_recurrent_step(
+    B: int,
+    H: int,
+    D: int,
+    dtype: torch.dtype,
+):
+    torch.manual_seed(42)
+    r = torch.randn((B, 1, H, D), dtype=dtype, device=device)
+    k = torch.randn((B, 1, H, D), dtype=dtype, device=device)
+    v = torch.randn((B, 1, H, D), dtype=dtype, device=device)
+    w = torch.randn((B, 1, H, D), dtype=dtype, device=device)
+    u = torch.randn(H, D, dtype=dtype, device=device)
+    h0 = torch.randn(B, H, D, D, dtype=torch.float, device=device)
+
+    ref, ref_ht = fused_recurrent_rwkv6(
+        r, k, v, w, u,
+        scale=1.,
+        initial_state=h0.clone(),
+        output_final_state=True,
+        use_neg_exp_w_in_kernel=True
+    )
+    tri, tri_ht = fused_recurrent_rwkv6_step(
+        r, k, v, w, u,
+        scale=1.,
+        initial_state=h0.clone(),
+        output_final_state=True,
+        use_neg_exp_w_in_kernel=True
+    )
+    assert_close('o', ref, tri, 0.002)
+    assert_close('ht', ref_ht, tri_ht, 0.002)